@@ -1,14 +1,28 @@
 import streamlit as st
 import pandas as pd
-import yfinance as yf
-from datetime import datetime, timedelta
+from datetime import datetime
+import functools
 import os
+import time
 import warnings
 import gspread
+from gspread.utils import fill_gaps
 from google.oauth2.service_account import Credentials
 import plotly.express as px
 import plotly.graph_objects as go
-import requests
+from ledger import ZamanIndeksi, calculate_portfolio_incremental, yas_kovasi_adlari
+from pricehistory import kapanis_matrisi, piyasa_gecmisi
+from backfill import yeniden_olustur
+import sayfalar
+import writer
+from storage import depo_ac
+from transactions import ice_aktar, ice_aktarim_plani, islem_satirlari, sembol_tur_belirle
+import poller
+import profiler
+import sheetsclient
+import snapshots
+import valuation
+from quotes import FON_DEADLINE, FON_WORKERS, get_fund_prices, yf_sembol
 
 warnings.simplefilter(action="ignore", category=FutureWarning)
 
@@ -16,46 +30,27 @@ st.set_page_config(layout="wide", page_title="Portfoy v70")
 
 SHEET_ID = "1_isL5_B9EiyLppqdP4xML9N4_pLdvgNYIei70H5yiew"
 JSON_FILE = "service_account.json"
+LEDGER_CHECKPOINT_FILE = ".ledger_checkpoint.pkl"
+MIRROR_FILE = ".sheet_mirror.sqlite"
+PRICE_HISTORY_FILE = ".price_history.sqlite"
+# "sheets" (varsayılan) veya "local": local depo Google hesabı ve ağ olmadan çalışır
+STORAGE_BACKEND = os.environ.get("PORTFOY_STORAGE", "sheets")
+LOCAL_STORAGE_FILE = os.environ.get("PORTFOY_LOCAL_DB", "portfoy_local.sqlite")
+LOCAL_SEED_CSV = "portfolio_transactions.csv"
+# Canlı modda PORTFÖY metrik ve tablosunun yenilenme aralığı (saniye)
+CANLI_ARALIK = 15
+OKUNAN_SAYFALAR = ["Islemler", "Nakit", "Fiyatlar", "Gecmis", "VarlikKari"]
+
+# Script her rerun'da baştan çalıştığı için bu sözlükler de her rerun'da boşalır
+_sheet_verileri = {}
+_okunamayan_hucre = {}
+_dugumler = {}
+_dugum_raporu = {}
+_calisma_baslangici = time.time()
 
 # Dönüm noktası — bu tarihteki efektif anapara
 BASLANGIC_ANAPARA = 2_681_425.0
 
-FINTABLES_HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 Chrome/120.0.0.0 Safari/537.36",
-    "Accept": "application/json",
-}
-
-
-def safe_float(val):
-    if val is None or val == "":
-        return 0.0
-    if isinstance(val, (int, float)):
-        return float(val)
-    val_str = str(val).strip()
-    if "." in val_str and "," in val_str:
-        val_str = val_str.replace(".", "")
-    val_str = val_str.replace(",", ".")
-    try:
-        return float(val_str)
-    except:
-        return 0.0
-
-
-def safe_adet(val):
-    if val is None or val == "":
-        return 0.0
-    if isinstance(val, (int, float)):
-        return float(val)
-    val_str = str(val).strip().replace("\xa0", "").replace(" ", "")
-    if "," in val_str:
-        val_str = val_str.replace(".", "").replace(",", ".")
-    else:
-        val_str = val_str.replace(".", "")
-    try:
-        return float(val_str)
-    except:
-        return 0.0
-
 
 def renk(val):
     c = ""
@@ -76,36 +71,29 @@ def renk(val):
     return ""
 
 
-def sembol_tur_belirle(sembol):
-    return "Fon" if len(sembol.strip()) == 3 else "Hisse"
-
-
-def normalize_islem(islem):
-    s = str(islem).strip().upper()
-    s = s.replace("İ", "I").replace("Ş", "S").replace("Ç", "C")
-    s = s.replace("Ğ", "G").replace("Ü", "U").replace("Ö", "O")
-    if s.startswith("AL"):
-        return "ALIS"
-    if s.startswith("SAT"):
-        return "SATIS"
-    return s
+def _izlenen_client(credentials):
+    # İstekler kota sınırlayıcıdan geçer; sayısı ve boyutu profil paneline yazılır
+    client = gspread.authorize(credentials, http_client=sheetsclient.KotaliHTTPClient)
+    profiler.oturumu_izle(client.http_client.session, "sheets")
+    return client
 
 
 @st.cache_resource
+@profiler.olculen("init_connection")
 def init_connection():
     scopes = [
         "https://www.googleapis.com/auth/spreadsheets",
         "https://www.googleapis.com/auth/drive",
     ]
     if os.path.exists(JSON_FILE):
-        return gspread.authorize(
+        return _izlenen_client(
             Credentials.from_service_account_file(JSON_FILE, scopes=scopes)
         )
     try:
         info = dict(st.secrets["gcp_service_account"])
         if "private_key" in info:
             info["private_key"] = info["private_key"].replace("\\n", "\n")
-        return gspread.authorize(
+        return _izlenen_client(
             Credentials.from_service_account_info(info, scopes=scopes)
         )
     except Exception as e:
@@ -113,89 +101,124 @@ def init_connection():
         st.stop()
 
 
-@st.cache_data(ttl=300)
-def get_fund_price_fintables(fon_kod):
-    try:
-        url = f"https://api.fintables.com/funds/{fon_kod.upper()}/price/"
-        r = requests.get(url, headers=FINTABLES_HEADERS, timeout=8)
-        if r.status_code == 200:
-            data = r.json()
-            price = float(data.get("price", 0))
-            prev_price = float(data.get("prev_price", 0))
-            gunluk_pct = ((price - prev_price) / prev_price) * 100 if prev_price > 0 else 0.0
-            return price, gunluk_pct
-    except Exception as e:
-        print(f"[Fintables] {fon_kod} hata: {e}")
-    return 0.0, 0.0
+@st.cache_resource
+def get_storage():
+    return depo_ac(
+        STORAGE_BACKEND, client_ac=init_connection, sheet_id=SHEET_ID,
+        mirror_yol=MIRROR_FILE, yerel_yol=LOCAL_STORAGE_FILE, tohum_csv=LOCAL_SEED_CSV,
+    )
+
+
+@st.cache_resource
+def get_market_poller():
+    # Süreç başına tek takipçi; tüm oturumların sembolleri aynı turda çekilir
+    poller.baslat()
+    return poller
+
+
+def sheet_verileri(*adlar):
+    # Sadece istenen eksik sayfalar depodan okunur; sonuç rerun boyunca paylaşılır.
+    # Olmayan sayfa None olarak tutulur
+    eksik = [ad for ad in (adlar or OKUNAN_SAYFALAR) if ad not in _sheet_verileri]
+    if eksik:
+        _sheet_verileri.update(get_storage().oku(eksik))
+    return _sheet_verileri
+
+
+def sayfa_degerleri(ad):
+    return sheet_verileri(ad)[ad]
+
+
+def okunamayanlari_kaydet(sayfa, sonuc):
+    df, okunamayan = sonuc
+    _okunamayan_hucre.update({(sayfa, kolon): adet for kolon, adet in okunamayan.items()})
+    return df
 
 
-def refresh_fund_prices_in_sheet(active_symbols=None):
-    client = init_connection()
-    sheet = client.open_by_key(SHEET_ID).worksheet("Fiyatlar")
-    raw = sheet.get_all_values()
+def sayfa_gecersiz_kil(*adlar):
+    # Sürüm depoya yazarken zaten artar; burada sadece bu rerun'daki satırlar atılır
+    for ad in adlar:
+        _sheet_verileri.pop(ad, None)
+
+
+@st.cache_data(max_entries=20, show_spinner=False)
+def _surumlu_oku(sayfa, surum, ad, _okuyucu):
+    sonuc = _okuyucu()
+    return sonuc, {k: v for k, v in _okunamayan_hucre.items() if k[0] == sayfa}
+
+
+def sayfa_surumlu(sayfa):
+    # Okuyucu sadece sayfanın sürümü değişince yeniden çalışır; başka sayfaya yazmak,
+    # kotasyonlar, piyasa geçmişi ve Sheets bağlantısı bu önbelleği etkilemez
+    def sarmala(okuyucu):
+        @functools.wraps(okuyucu)
+        def sarilmis():
+            sonuc, okunamayan = _surumlu_oku(sayfa, get_storage().surum(sayfa), okuyucu.__name__, okuyucu)
+            _okunamayan_hucre.update(okunamayan)
+            return sonuc
+        return sarilmis
+    return sarmala
+
+
+def refresh_fund_prices_in_sheet(active_symbols=None, max_workers=FON_WORKERS, deadline=FON_DEADLINE):
+    depo = get_storage()
+    raw = fill_gaps(depo.degerler(["Fiyatlar"])[0] or [])
     if len(raw) < 2:
-        return {"updated": 0, "failed": 0, "total": 0}
+        return {"updated": 0, "stale": 0, "failed": 0, "total": 0,
+                "guncellenen": [], "eski": [], "basarisiz": []}
     active_symbols = set(active_symbols or [])
+    sheet_symbols = [str(row[0]).strip().upper() if len(row) > 0 else "" for row in raw[1:]]
+    cekilen = get_fund_prices([sym for sym in sheet_symbols if sym and sym in active_symbols],
+                              max_workers=max_workers, deadline=deadline)
     updates = []
-    updated_count = 0
-    failed_count = 0
-    for row in raw[1:]:
-        symbol = str(row[0]).strip().upper() if len(row) > 0 else ""
+    for symbol, row in zip(sheet_symbols, raw[1:]):
         old_price = row[1] if len(row) > 1 and row[1] else "0"
         old_pct = row[2] if len(row) > 2 and row[2] else "0"
         new_row = [old_price, old_pct]
-        if symbol and symbol in active_symbols:
-            price, pct = get_fund_price_fintables(symbol)
-            if price > 0:
-                new_row = [str(price).replace(".", ","), str(round(pct, 4)).replace(".", ",")]
-                updated_count += 1
-            else:
-                failed_count += 1
+        if symbol in cekilen["fiyatlar"]:
+            price, pct = cekilen["fiyatlar"][symbol]
+            new_row = [str(price).replace(".", ","), str(round(pct, 4)).replace(".", ",")]
         updates.append(new_row)
+    guncellemeler = [{"range": "B1:D1", "values": [["Fiyat", "Günlük %", datetime.now().strftime("%Y-%m-%d %H:%M:%S")]]}]
     if updates:
-        sheet.update(f"B2:C{len(updates)+1}", updates, value_input_option="RAW")
-    sheet.update("B1:D1", [["Fiyat", "Günlük %", datetime.now().strftime("%Y-%m-%d %H:%M:%S")]])
-    return {"updated": updated_count, "failed": failed_count, "total": len(active_symbols)}
+        guncellemeler.insert(0, {"range": f"B2:C{len(updates)+1}", "values": updates})
+    depo.guncelle("Fiyatlar", guncellemeler)
+    sayfa_gecersiz_kil("Fiyatlar")
+    return {
+        "updated": len(cekilen["guncellenen"]), "stale": len(cekilen["eski"]),
+        "failed": len(cekilen["basarisiz"]), "total": len(active_symbols),
+        "guncellenen": cekilen["guncellenen"], "eski": cekilen["eski"], "basarisiz": cekilen["basarisiz"],
+    }
 
 
+@profiler.olculen("get_nakit_data")
+@sayfa_surumlu("Nakit")
 def get_nakit_data():
-    client = init_connection()
     try:
-        try:
-            sheet = client.open_by_key(SHEET_ID).worksheet("Nakit")
-        except:
-            sheet = client.open_by_key(SHEET_ID).add_worksheet("Nakit", 1000, 4)
-            sheet.append_row(["Tarih", "Aciklama", "Tutar", "Tip"])
+        raw = sayfa_degerleri("Nakit")
+        if raw is None:
+            get_storage().sayfa_olustur("Nakit", ["Tarih", "Aciklama", "Tutar", "Tip"], 1000, 4)
+            _sheet_verileri["Nakit"] = [["Tarih", "Aciklama", "Tutar", "Tip"]]
             return pd.DataFrame(columns=["Tarih", "Aciklama", "Tutar", "Tip"])
-        raw = sheet.get_all_values()
-        if len(raw) < 2:
-            return pd.DataFrame(columns=["Tarih", "Aciklama", "Tutar", "Tip"])
-        df = pd.DataFrame(raw[1:], columns=raw[0])
-        df.index = range(2, len(df) + 2)
-        df["Tutar"] = df["Tutar"].apply(safe_float)
-        df["Tarih"] = pd.to_datetime(df["Tarih"], errors="coerce")
-        return df.dropna(subset=["Tarih"]).sort_values("Tarih")
+        return okunamayanlari_kaydet("Nakit", sayfalar.nakit(raw))
     except:
         return pd.DataFrame(columns=["Tarih", "Aciklama", "Tutar", "Tip"])
 
 
 def save_nakit(tarih, aciklama, tutar, tip):
-    client = init_connection()
+    depo = get_storage()
     try:
-        try:
-            sheet = client.open_by_key(SHEET_ID).worksheet("Nakit")
-        except:
-            sheet = client.open_by_key(SHEET_ID).add_worksheet("Nakit", 1000, 4)
-            sheet.append_row(["Tarih", "Aciklama", "Tutar", "Tip"])
-        sheet.append_row([tarih, aciklama, str(tutar).replace(".", ","), tip])
+        if depo.degerler(["Nakit!A1"])[0] is None:
+            depo.sayfa_olustur("Nakit", ["Tarih", "Aciklama", "Tutar", "Tip"], 1000, 4)
+        depo.satir_ekle("Nakit", [[tarih, aciklama, str(tutar).replace(".", ","), tip]])
     except Exception as e:
         st.error(f"Nakit kayıt hatası: {e}")
+    sayfa_gecersiz_kil("Nakit")
 
 
 def delete_nakit_row(row_index):
-    client = init_connection()
-    sheet = client.open_by_key(SHEET_ID).worksheet("Nakit")
-    sheet.delete_rows(int(row_index))
+    get_storage().satir_sil("Nakit", int(row_index))
+    sayfa_gecersiz_kil("Nakit")
 
 
 def get_nakit_bakiye(df_nakit):
@@ -225,287 +248,254 @@ def get_dis_para_neti(df_nakit):
     return girdi - cikti
 
 
+@profiler.olculen("get_data")
+@sayfa_surumlu("Islemler")
 def get_data():
-    client = init_connection()
     try:
-        sheet = client.open_by_key(SHEET_ID).worksheet("Islemler")
-        raw = sheet.get_all_values()
-        if len(raw) < 2:
-            return pd.DataFrame()
-        df = pd.DataFrame(raw[1:], columns=raw[0])
-        df.index = range(2, len(df) + 2)
-        if "Adet" in df.columns:
-            df["Adet"] = df["Adet"].apply(safe_adet)
-        for c in ["Fiyat", "Komisyon", "Toplam"]:
-            if c in df.columns:
-                df[c] = df[c].apply(safe_float)
-        df["Tarih"] = pd.to_datetime(df["Tarih"], dayfirst=False, errors="coerce")
-        if "Sembol" in df.columns:
-            df["Sembol"] = df["Sembol"].astype(str).str.strip().str.upper().str.replace(".IS", "")
-        return df
+        return okunamayanlari_kaydet("Islemler", sayfalar.islemler(sayfa_degerleri("Islemler") or []))
     except:
         return pd.DataFrame()
 
 
-def save_transaction(veri):
-    client = init_connection()
-    sheet = client.open_by_key(SHEET_ID).worksheet("Islemler")
-    islem_yaz = "Alis" if veri["Islem"] in ["Alış", "Alis"] else "Satis"
-    row = [
-        veri["Tarih"], veri["Tur"], islem_yaz, veri["Sembol"], veri["Adet"],
-        str(veri["Fiyat"]).replace(".", ","),
-        str(veri["Komisyon"]).replace(".", ","),
-        str(veri["Toplam"]).replace(".", ",")
-    ]
-    sheet.append_row(row)
+def fon_kayitlari():
+    # Fiyatlar'daki semboller sürüm önbelleğinden; sayfa yoksa fon kaydı eklenmez
+    return set(get_fund_data_from_sheet()) if sayfa_degerleri("Fiyatlar") is not None else None
+
+
+def nakit_sayfasi_hazirla():
+    if sayfa_degerleri("Nakit") is None:
+        get_storage().sayfa_olustur("Nakit", ["Tarih", "Aciklama", "Tutar", "Tip"], 1000, 4)
+
+
+def save_transaction(*veriler):
+    # İşlem, fon kaydı ve nakit satırları tek istekte yazılır; Sheets hepsini birlikte uygular
+    kayitli_fonlar = fon_kayitlari()
+    eklemeler = {}
+    for veri in veriler:
+        for sayfa, satirlar in islem_satirlari(veri, kayitli_fonlar).items():
+            eklemeler.setdefault(sayfa, []).extend(satirlar)
     try:
-        p_sheet = client.open_by_key(SHEET_ID).worksheet("Fiyatlar")
-        vals = [str(x).strip().upper() for x in p_sheet.col_values(1)]
-        if veri["Sembol"] not in vals and veri["Tur"] == "Fon":
-            p_sheet.append_row([veri["Sembol"], 0, 0])
-    except:
-        pass
-    toplam = float(veri["Toplam"])
-    if veri["Islem"] in ["Satış", "Satis"] and toplam > 0:
-        save_nakit(veri["Tarih"], f"{veri['Sembol']} satis geliri", toplam, "Giriş")
-    elif veri["Islem"] in ["Alış", "Alis"] and toplam > 0:
-        save_nakit(veri["Tarih"], f"{veri['Sembol']} alis odemesi", toplam, "Çıkış")
+        if eklemeler["Nakit"]:
+            nakit_sayfasi_hazirla()
+        get_storage().satirlar_ekle(eklemeler)
+    except Exception as e:
+        st.error(f"Kayıt hatası: {e}. Satırlar ya hep birlikte yazıldı ya hiç yazılmadı; tekrar girmeden önce 📋 GEÇMİŞ'i kontrol edin.")
+        return False
+    finally:
+        sayfa_gecersiz_kil("Islemler", "Fiyatlar", "Nakit")
+    return True
 
 
+@profiler.olculen("get_fund_data_from_sheet")
+@sayfa_surumlu("Fiyatlar")
 def get_fund_data_from_sheet():
-    client = init_connection()
     try:
-        sheet = client.open_by_key(SHEET_ID).worksheet("Fiyatlar")
-        raw = sheet.get_all_values()
-        data_dict = {}
-        for row in raw[1:]:
-            if len(row) >= 2:
-                sym = str(row[0]).strip().upper()
-                price = safe_float(row[1])
-                change_pct = safe_float(row[2]) if len(row) > 2 else 0.0
-                data_dict[sym] = {"fiyat": price, "yuzde": change_pct}
-        return data_dict
+        return sayfalar.fon_fiyatlari(sayfa_degerleri("Fiyatlar") or [])
     except:
         return {}
 
 
-def save_daily_snapshot(tv, tm, dk, net_ana, nakit):
-    if tv < 100 and tm > 1000:
-        return
-    client = init_connection()
+def get_fund_price_age():
+    # Fon fiyatları Fiyatlar sayfasından gelir; yaşı D1'deki son güncelleme zamanıdır
     try:
-        try:
-            sheet = client.open_by_key(SHEET_ID).worksheet("Gecmis")
-        except:
-            sheet = client.open_by_key(SHEET_ID).add_worksheet("Gecmis", 1000, 6)
-            sheet.append_row(["Tarih", "ToplamVarlik", "ToplamMaliyet", "DolarKuru", "NetAnaPara", "Nakit"])
+        raw = sayfa_degerleri("Fiyatlar") or []
+        return (datetime.now() - datetime.strptime(raw[0][3], "%Y-%m-%d %H:%M:%S")).total_seconds()
     except:
-        return
+        return None
 
-    current_header = sheet.row_values(1)
-    if "Nakit" not in current_header:
-        new_header = current_header + ["Nakit"]
-        sheet.update("A1:" + chr(64 + len(new_header)) + "1", [new_header])
-        current_header = new_header
 
-    nakit_col = current_header.index("Nakit") + 1
-    bugun = datetime.now().strftime("%Y-%m-%d")
-    dates = sheet.col_values(1)
-    d = [bugun, str(tv).replace(".", ","), str(tm).replace(".", ","),
-         str(dk).replace(".", ","), str(net_ana).replace(".", ",")]
-
-    if bugun not in dates:
-        sheet.append_row(d + [str(nakit).replace(".", ",")])
-    else:
-        idx = dates.index(bugun) + 1
-        for i, val in enumerate(d[1:]):
-            sheet.update_cell(idx, i + 2, val)
-        sheet.update_cell(idx, nakit_col, str(nakit).replace(".", ","))
+def save_daily_snapshot(tv, tm, dk, net_ana, nakit):
+    snapshots.save_daily_snapshot(get_storage(), tv, tm, dk, net_ana, nakit)
+    sayfa_gecersiz_kil("Gecmis")
 
 
 def save_asset_snapshots(liste):
-    client = init_connection()
-    bugun = datetime.now().strftime("%Y-%m-%d")
-    try:
-        try:
-            sheet = client.open_by_key(SHEET_ID).worksheet("VarlikKari")
-        except:
-            sheet = client.open_by_key(SHEET_ID).add_worksheet("VarlikKari", 1000, 26)
-            sheet.append_row(["Tarih"])
-        headers = sheet.row_values(1)
-        if not headers:
-            headers = ["Tarih"]
-        data_dict = {item["Varlık"]: str(item["K/Z (%)"]).replace(".", ",") for item in liste
-                     if item["K/Z (%)"] != float('inf')}
-        added_header = False
-        for sym in data_dict.keys():
-            if sym not in headers:
-                headers.append(sym)
-                added_header = True
-        if added_header:
-            for c_idx, h_val in enumerate(headers):
-                sheet.update_cell(1, c_idx + 1, h_val)
-        dates = sheet.col_values(1)
-        row_data = [bugun]
-        for h in headers[1:]:
-            row_data.append(data_dict.get(h, "0"))
-        if bugun not in dates:
-            sheet.append_row(row_data)
-        else:
-            r_idx = dates.index(bugun) + 1
-            for c_idx, val in enumerate(row_data):
-                sheet.update_cell(r_idx, c_idx + 1, val)
-    except:
-        pass
+    snapshots.save_asset_snapshots(get_storage(), liste)
+    sayfa_gecersiz_kil("VarlikKari")
 
 
+@profiler.olculen("get_asset_history")
+@sayfa_surumlu("VarlikKari")
 def get_asset_history():
-    client = init_connection()
     try:
-        sheet = client.open_by_key(SHEET_ID).worksheet("VarlikKari")
-        raw = sheet.get_all_values()
-        if len(raw) < 2:
-            return pd.DataFrame()
-        actual_cols = raw[0]
-        valid_data = []
-        for r in raw[1:]:
-            r_padded = r + ["0"] * (len(actual_cols) - len(r))
-            valid_data.append(r_padded[:len(actual_cols)])
-        df = pd.DataFrame(valid_data, columns=actual_cols)
-        for c in df.columns:
-            if c != "Tarih":
-                df[c] = df[c].apply(safe_float)
-        df["Tarih"] = pd.to_datetime(df["Tarih"], errors="coerce")
-        df = df.dropna(subset=["Tarih"])
-        return df.sort_values("Tarih", ascending=True)
+        return okunamayanlari_kaydet("VarlikKari", sayfalar.varlik_kari(sayfa_degerleri("VarlikKari") or []))
     except:
         return pd.DataFrame()
 
 
+@profiler.olculen("get_history_data")
+@sayfa_surumlu("Gecmis")
 def get_history_data():
-    client = init_connection()
     try:
-        sheet = client.open_by_key(SHEET_ID).worksheet("Gecmis")
-        raw = sheet.get_all_values()
-        if len(raw) < 2:
-            return pd.DataFrame()
-        actual_cols = raw[0]
-        valid_data = []
-        for r in raw[1:]:
-            r_padded = r + ["0"] * (len(actual_cols) - len(r))
-            valid_data.append(r_padded[:len(actual_cols)])
-        df = pd.DataFrame(valid_data, columns=actual_cols)
-        for c in ["ToplamVarlik", "ToplamMaliyet", "DolarKuru", "NetAnaPara", "Nakit"]:
-            if c in df.columns:
-                df[c] = df[c].apply(safe_float)
-            else:
-                df[c] = 0.0
-        df["Tarih"] = pd.to_datetime(df["Tarih"], errors="coerce")
-        df = df.dropna(subset=["Tarih"])
-        return df.sort_values("Tarih", ascending=True)
+        return okunamayanlari_kaydet("Gecmis", sayfalar.gecmis(sayfa_degerleri("Gecmis") or []))
     except:
         return pd.DataFrame()
 
 
 @st.cache_data(ttl=3600)
 def get_historical_market_data():
-    end = datetime.now()
-    start = end - timedelta(days=365 * 5)
-    usd = yf.download("USDTRY=X", start=start, end=end, progress=False)
-    gold = yf.download("GC=F", start=start, end=end, progress=False)
-    if usd.empty or gold.empty:
-        return pd.DataFrame()
-    usd = usd["Close"].reset_index()
-    usd.columns = ["Date", "USD"]
-    usd["Date"] = pd.to_datetime(usd["Date"]).dt.date
-    gold = gold["Close"].reset_index()
-    gold.columns = ["Date", "Gold_Ounce"]
-    gold["Date"] = pd.to_datetime(gold["Date"]).dt.date
-    m = pd.merge(usd, gold, on="Date", how="outer").sort_values("Date").ffill()
-    m["Gram_Gold"] = (m["Gold_Ounce"] * m["USD"]) / 31.1035
-    m.set_index("Date", inplace=True)
-    return m
-
-
-@st.cache_data(ttl=300)
-def get_stock_data_full(symbol):
-    try:
-        s = symbol.strip().upper()
-        if not s.endswith(".IS"):
-            s += ".IS"
-        info = yf.Ticker(s).fast_info
-        return info["last_price"], info["previous_close"]
-    except:
-        return 0.0, 0.0
+    return piyasa_gecmisi(PRICE_HISTORY_FILE)
+
+
+@st.cache_data(ttl=3600, max_entries=4, show_spinner=False)
+def _geri_doldur(islem_surumu, nakit_surumu, fiyat_surumu, gun, _df, _nakit, _fon_fiyatlari):
+    # Sürümler ve gün anahtardır; işlem, nakit veya fon fiyatı değişince ya da gün dönünce
+    # yeniden kurulur. Hisse kapanışları tek toplu istekle yerel fiyat geçmişinden gelir
+    hisseler = sorted(set(_df.loc[_df["Tur"] == "Hisse", "Sembol"]))
+    kapanislar = kapanis_matrisi(PRICE_HISTORY_FILE, [yf_sembol(s) for s in hisseler], _df["Tarih"].min().date())
+    kapanislar = kapanislar.rename(columns={yf_sembol(s): s for s in hisseler})
+    guncel = {sym: v["fiyat"] for sym, v in _fon_fiyatlari.items()}
+    return yeniden_olustur(_df, kapanislar, guncel, _nakit, bitis=gun)
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _zaman_indeksi(islem_surumu, nakit_surumu, _df, _nakit):
+    # Sorgular kopya üzerinde çalışır; paylaşılan indeks değişmez
+    return ZamanIndeksi(_df, _nakit)
 
 
-@st.cache_data(ttl=3600)
 def get_usd_rate():
-    try:
-        return yf.Ticker("USDTRY=X").fast_info["last_price"]
-    except:
-        return 1.0
-
-
-def calculate_portfolio_unified(df):
-    portfolio = {}
-    if df.empty or "Tarih" not in df.columns:
-        return {}, 0, 0
-    df = df.sort_values("Tarih", kind="mergesort")
-    toplam_giren = 0
-    toplam_cikan = 0
-    for _, row in df.iterrows():
-        sym = row["Sembol"]
-        typ = row["Tur"]
-        islem = normalize_islem(row["Islem"])
-        qty = float(row["Adet"])
-        total = float(row["Toplam"])
-        tarih = row["Tarih"]
-
-        if islem == "ALIS":
-            toplam_giren += total
-        elif islem == "SATIS":
-            toplam_cikan += total
-
-        if sym not in portfolio:
-            portfolio[sym] = {"Adet": 0, "Maliyet": 0, "NetGiris": 0.0, "Tur": typ, "Alimlar": []}
-
-        if islem == "ALIS":
-            portfolio[sym]["Adet"] += qty
-            portfolio[sym]["Maliyet"] += total
-            portfolio[sym]["NetGiris"] += total
-            portfolio[sym]["Alimlar"].append({"adet": qty, "tarih": tarih})
-        elif islem == "SATIS":
-            if portfolio[sym]["Adet"] > 0:
-                avg_cost = portfolio[sym]["Maliyet"] / portfolio[sym]["Adet"]
-                portfolio[sym]["Maliyet"] -= (qty * avg_cost)
-                portfolio[sym]["Adet"] -= qty
-                portfolio[sym]["NetGiris"] -= total
-                kalan_satis = qty
-                while kalan_satis > 0 and len(portfolio[sym]["Alimlar"]) > 0:
-                    ilk_alim = portfolio[sym]["Alimlar"][0]
-                    if ilk_alim["adet"] <= kalan_satis:
-                        kalan_satis -= ilk_alim["adet"]
-                        portfolio[sym]["Alimlar"].pop(0)
-                    else:
-                        ilk_alim["adet"] -= kalan_satis
-                        kalan_satis = 0
+    kur = get_market_poller().usd_kuru()
+    return kur[0] if kur else 1.0
+
+
+def portfoy_degerle(portfolio, fund_data, fon_yasi):
+    # Hisse fiyatları ortak depodan okunur; ağa ve Sheets'e gidilmez
+    hisse_fiyatlari = get_market_poller().hisse_fiyatlari(
+        sym for sym, data in portfolio.items() if data["Adet"] > 0 and data["Tur"] == "Hisse"
+    )
+    return valuation.portfoy_degerle(portfolio, hisse_fiyatlari, fund_data, fon_yasi)
+
+
+def dugum(ad):
+    # Hesap grafiğinin bir düğümü: ilk istendiğinde hesaplanır, rerun boyunca aynı sonuç
+    # döner. Bağımlılıklar düğüm içinden diğer düğümler çağrılarak tembel çözülür
+    def sarmala(fonk):
+        @functools.wraps(fonk)
+        def sarilmis():
+            rapor = _dugum_raporu.setdefault(ad, {"hesaplanan": 0, "isabet": 0})
+            if ad in _dugumler:
+                rapor["isabet"] += 1
             else:
-                portfolio[sym]["Adet"] = 0
-                portfolio[sym]["Maliyet"] = 0
-                portfolio[sym]["NetGiris"] = 0
-                portfolio[sym]["Alimlar"] = []
+                _dugumler[ad] = fonk()
+                rapor["hesaplanan"] += 1
+            return _dugumler[ad]
+        return sarilmis
+    return sarmala
+
+
+def dugum_gecersiz_kil(*adlar):
+    for ad in adlar:
+        _dugumler.pop(ad, None)
+
+
+@dugum("islemler")
+def islem_verisi():
+    return get_data()
+
+
+@dugum("ledger")
+def ledger_sonucu():
+    return calculate_portfolio_incremental(islem_verisi(), LEDGER_CHECKPOINT_FILE)
+
+
+@dugum("pozisyonlar")
+def acik_pozisyonlar():
+    return {sym: data for sym, data in ledger_sonucu()[0].items() if data["Adet"] > 0}
+
 
-        if portfolio[sym]["Adet"] <= 0.001:
-            portfolio[sym]["Adet"] = 0
-            portfolio[sym]["Maliyet"] = 0
-            portfolio[sym]["NetGiris"] = 0
-            portfolio[sym]["Alimlar"] = []
+@dugum("fon_fiyatlari")
+def fon_fiyatlari():
+    return get_fund_data_from_sheet(), get_fund_price_age()
 
-        if portfolio[sym]["NetGiris"] < 0:
-            portfolio[sym]["NetGiris"] = 0
 
-    return portfolio, toplam_giren, toplam_cikan
+@dugum("degerleme")
+def degerleme():
+    fund_data, fon_yasi = fon_fiyatlari()
+    return portfoy_degerle(acik_pozisyonlar(), fund_data, fon_yasi)
+
+
+@dugum("nakit")
+def nakit_verisi():
+    return get_nakit_data()
+
+
+@dugum("nakit_bakiye")
+def nakit_bakiyesi():
+    return get_nakit_bakiye(nakit_verisi())
+
+
+@dugum("gecmis")
+def gecmis_verisi():
+    return get_history_data()
+
+
+@dugum("varlik_gecmisi")
+def varlik_gecmisi():
+    return get_asset_history()
+
+
+@dugum("geri_doldurma")
+def geri_doldurma():
+    df = islem_verisi()
+    if df.empty or df["Tarih"].isna().all():
+        return pd.DataFrame(), pd.DataFrame()
+    depo = get_storage()
+    fund_data, _ = fon_fiyatlari()
+    return _geri_doldur(depo.surum("Islemler"), depo.surum("Nakit"), depo.surum("Fiyatlar"),
+                        datetime.now().strftime("%Y-%m-%d"), df, nakit_verisi(), fund_data)
+
+
+def _kayitla_birlestir(kayit, geri):
+    # Anlık kaydı olan günlerde kayıt esas alınır; kayıt olmayan günler işlemlerden kurulur
+    if geri.empty:
+        return kayit
+    if kayit.empty:
+        return geri.copy()
+    kayit = kayit.drop_duplicates(subset="Tarih", keep="last").set_index("Tarih")
+    return kayit.combine_first(geri.set_index("Tarih")).reset_index()
+
+
+@dugum("zaman_indeksi")
+def zaman_indeksi():
+    depo = get_storage()
+    return _zaman_indeksi(depo.surum("Islemler"), depo.surum("Nakit"), islem_verisi(), nakit_verisi())
+
+
+@dugum("gidisat")
+def gidisat_verisi():
+    return _kayitla_birlestir(gecmis_verisi(), geri_doldurma()[0])
+
+
+@dugum("varlik_gidisati")
+def varlik_gidisati():
+    return _kayitla_birlestir(varlik_gecmisi(), geri_doldurma()[1])
+
+
+@st.cache_resource
+def _son_kuyruklanan():
+    # Süreç başına sayfa -> (gün, değerler); aynı gün aynı değerler tekrar kuyruğa alınmaz
+    return {}
+
+
+def gunluk_kayitlari_kuyrukla(liste):
+    # PORTFÖY'ün zaten hesapladığı değerlemeyle günün kayıtları kuyruğa alınır; diğer
+    # sekmeler değerleme yapmaz. Kayıtlar arka planda yazılır, sayfa beklemez
+    if not liste:
+        return
+    _, t_giren, t_cikan = ledger_sonucu()
+    toplam_portfoy_degeri = pd.DataFrame(liste)["Değer (TL)"].sum()
+    toplam_maliyet = sum([x["Ort. Maliyet"] * x["Lot"] for x in liste])
+    bugun_str = datetime.now().strftime("%Y-%m-%d")
+    son = _son_kuyruklanan()
+    gunluk = (toplam_portfoy_degeri, toplam_maliyet, get_usd_rate(), t_giren - t_cikan, nakit_bakiyesi())
+    if son.get("Gecmis") != (bugun_str, gunluk):
+        son["Gecmis"] = (bugun_str, gunluk)
+        writer.kuyruga_ekle(("Gecmis", bugun_str), save_daily_snapshot, *gunluk)
+    varliklar = tuple((x["Varlık"], x["K/Z (%)"]) for x in liste)
+    if son.get("VarlikKari") != (bugun_str, varliklar):
+        son["VarlikKari"] = (bugun_str, varliklar)
+        writer.kuyruga_ekle(("VarlikKari", bugun_str), save_asset_snapshots, liste)
 
 
 def duzeltme_islemi_kaydet(mevcut_portfolio):
@@ -546,8 +536,8 @@ def duzeltme_islemi_kaydet(mevcut_portfolio):
                               "Sembol": sembol_sec, "Adet": yeni_adet, "Fiyat": yeni_ort_maliyet,
                               "Komisyon": 0, "Toplam": yeni_toplam}
                     with st.spinner("Kaydediliyor..."):
-                        save_transaction(sifir)
-                        save_transaction(yeni_r)
+                        if not save_transaction(sifir, yeni_r):
+                            return
                     st.success(f"✅ Maliyet düzeltmesi kaydedildi: {yeni_adet:.0f} lot @ {yeni_ort_maliyet:.4f} TL")
                 else:
                     if fark_adet > 0:
@@ -564,9 +554,9 @@ def duzeltme_islemi_kaydet(mevcut_portfolio):
                             "Sembol": sembol_sec, "Adet": islem_adet, "Fiyat": islem_fiyat,
                             "Komisyon": 0, "Toplam": islem_toplam}
                     with st.spinner("Kaydediliyor..."):
-                        save_transaction(veri)
+                        if not save_transaction(veri):
+                            return
                     st.success(f"✅ {islem} kaydedildi: {islem_adet:.0f} lot @ {islem_fiyat:.4f} TL")
-                st.cache_data.clear()
                 st.rerun()
 
 
@@ -602,414 +592,509 @@ if st.sidebar.button("🔒 Çıkış"):
     del st.session_state["password_correct"]
     st.rerun()
 
+yazici_bekleyen = writer.bekleyen_sayisi()
+son_yazim = writer.durum["son_yazim"]
+st.sidebar.caption(
+    f"💾 Kayıt kuyruğu: {yazici_bekleyen} bekliyor · "
+    f"son yazım {son_yazim.strftime('%H:%M:%S') if son_yazim else '-'}"
+)
+if writer.durum["son_hata"]:
+    st.sidebar.caption(f"⚠️ Son kayıt hatası: {writer.durum['son_hata']}")
+takipci = get_market_poller()
+son_tur = takipci.durum["son_tur"]
+st.sidebar.caption(
+    f"📡 Piyasa {'açık' if takipci.bist_acik_mi() else 'kapalı'} · "
+    f"{takipci.durum['sembol']} sembol · son tur {son_tur.strftime('%H:%M:%S') if son_tur else '-'}"
+)
+
 try:
-    df = get_data()
+    df = islem_verisi()
 except:
     st.stop()
 
 mevcut_semboller = sorted(df["Sembol"].dropna().unique().tolist()) if not df.empty else []
 
-tab1, tab2, tab3, tab4, tab5 = st.tabs(["➕ EKLE", "📊 PORTFÖY", "💵 NAKİT", "📈 GİDİŞAT", "📋 GEÇMİŞ"])
+# Sadece seçili sekmenin gövdesi çalışır; sekme değişince script yeniden çalışır.
+# Gizli sekmedeki widget'lar temizlenmesin diye canlı mod durumu elle korunur
+if "canli_portfoy" in st.session_state:
+    st.session_state["canli_portfoy"] = st.session_state["canli_portfoy"]
+tab1, tab2, tab3, tab4, tab5 = st.tabs(
+    ["➕ EKLE", "📊 PORTFÖY", "💵 NAKİT", "📈 GİDİŞAT", "📋 GEÇMİŞ"], key="sekme", on_change="rerun"
+)
 
 # ================================================================
 with tab1:
-    mod = st.radio("Mod:", ["Yeni İşlem", "Pozisyon Düzelt"], horizontal=True)
-    st.divider()
-
-    if mod == "Yeni İşlem":
-        col_ekle, col_sil = st.columns([2, 1])
-        with col_ekle:
-            st.subheader("İşlem")
-            metod = st.radio("Yöntem:", ["Birim Fiyat", "Toplam Tutar"], horizontal=True)
-            with st.form("ekle", clear_on_submit=True):
-                yon = st.radio("Yön", ["Alış", "Satış"], horizontal=True)
-                ca, cb = st.columns(2)
-                tarih = ca.date_input("Tarih", datetime.now())
-                kod_options = ["— Yeni sembol gir —"] + mevcut_semboller
-                kod_sec = cb.selectbox("Sembol Seç / Yeni Gir", kod_options)
-                if kod_sec == "— Yeni sembol gir —":
-                    kod = st.text_input("Yeni Sembol Kodu").strip().upper()
-                else:
-                    kod = kod_sec
-                if kod:
-                    tur_auto = sembol_tur_belirle(kod)
-                    st.caption(f"📌 Tür: **{tur_auto}** ({'3 harf = Fon' if tur_auto == 'Fon' else '3 harften fazla = Hisse'})")
-                adet = st.number_input("Adet", min_value=1, step=1)
-                fiyat = 0.0
-                kom = 0.0
-                toplam = 0.0
-                cc, cd = st.columns(2)
-                if metod == "Birim Fiyat":
-                    fiyat = cc.number_input("Fiyat", min_value=0.0, format="%.6f")
-                    kom = cd.number_input("Komisyon", min_value=0.0, format="%.2f")
-                else:
-                    toplam_girilen = cc.number_input("Net Tutar", min_value=0.0, format="%.2f")
-
-                if st.form_submit_button("KAYDET"):
-                    if kod and adet > 0:
-                        hata = False
-                        if metod == "Birim Fiyat":
-                            if yon == "Satış" and fiyat <= 0:
-                                st.error("⚠️ Satış için fiyat 0'dan büyük olmalıdır!")
-                                hata = True
-                            elif fiyat >= 0:
-                                raw_t = adet * fiyat
-                                toplam = raw_t + kom if yon == "Alış" else raw_t - kom
-                            else:
-                                hata = True
-                        else:
-                            if yon == "Satış" and toplam_girilen <= 0:
-                                st.error("⚠️ Satış için tutar 0'dan büyük olmalıdır!")
-                                hata = True
-                            elif toplam_girilen >= 0:
-                                toplam = toplam_girilen
-                                fiyat = (toplam_girilen / adet) if adet > 0 else 0
-                                kom = 0
-                            else:
-                                hata = True
-                        if not hata:
-                            yeni = {
-                                "Tarih": tarih.strftime("%Y-%m-%d"),
-                                "Tur": sembol_tur_belirle(kod),
-                                "Islem": yon, "Sembol": kod, "Adet": adet,
-                                "Fiyat": fiyat, "Komisyon": kom, "Toplam": toplam
-                            }
-                            with st.spinner("Kaydediliyor..."):
-                                save_transaction(yeni)
-                                st.success("Tamam!")
-                                st.cache_data.clear()
-                                st.rerun()
+    if tab1.open:
+        mod = st.radio("Mod:", ["Yeni İşlem", "Pozisyon Düzelt", "Toplu İçe Aktar"], horizontal=True)
+        st.divider()
 
-        with col_sil:
-            st.subheader("Sil")
-            try:
-                df_sil = get_data()
-                if not df_sil.empty:
-                    st.dataframe(df_sil.tail(5)[["Sembol", "Islem", "Toplam"]], use_container_width=True)
-                    secilen = st.selectbox("ID:", df_sil.index.sort_values(ascending=False))
-                    if st.button("Sil"):
-                        client = init_connection()
-                        client.open_by_key(SHEET_ID).worksheet("Islemler").delete_rows(int(secilen))
-                        st.success("Silindi!")
-                        st.cache_data.clear()
-                        st.rerun()
-            except:
-                pass
-    else:
-        if df.empty:
-            st.info("Henüz işlem kaydı yok.")
+        if mod == "Yeni İşlem":
+            col_ekle, col_sil = st.columns([2, 1])
+            with col_ekle:
+                st.subheader("İşlem")
+                metod = st.radio("Yöntem:", ["Birim Fiyat", "Toplam Tutar"], horizontal=True)
+                with st.form("ekle", clear_on_submit=True):
+                    yon = st.radio("Yön", ["Alış", "Satış"], horizontal=True)
+                    ca, cb = st.columns(2)
+                    tarih = ca.date_input("Tarih", datetime.now())
+                    kod_options = ["— Yeni sembol gir —"] + mevcut_semboller
+                    kod_sec = cb.selectbox("Sembol Seç / Yeni Gir", kod_options)
+                    if kod_sec == "— Yeni sembol gir —":
+                        kod = st.text_input("Yeni Sembol Kodu").strip().upper()
+                    else:
+                        kod = kod_sec
+                    if kod:
+                        tur_auto = sembol_tur_belirle(kod)
+                        st.caption(f"📌 Tür: **{tur_auto}** ({'3 harf = Fon' if tur_auto == 'Fon' else '3 harften fazla = Hisse'})")
+                    adet = st.number_input("Adet", min_value=1, step=1)
+                    fiyat = 0.0
+                    kom = 0.0
+                    toplam = 0.0
+                    cc, cd = st.columns(2)
+                    if metod == "Birim Fiyat":
+                        fiyat = cc.number_input("Fiyat", min_value=0.0, format="%.6f")
+                        kom = cd.number_input("Komisyon", min_value=0.0, format="%.2f")
+                    else:
+                        toplam_girilen = cc.number_input("Net Tutar", min_value=0.0, format="%.2f")
+
+                    if st.form_submit_button("KAYDET"):
+                        if kod and adet > 0:
+                            hata = False
+                            if metod == "Birim Fiyat":
+                                if yon == "Satış" and fiyat <= 0:
+                                    st.error("⚠️ Satış için fiyat 0'dan büyük olmalıdır!")
+                                    hata = True
+                                elif fiyat >= 0:
+                                    raw_t = adet * fiyat
+                                    toplam = raw_t + kom if yon == "Alış" else raw_t - kom
+                                else:
+                                    hata = True
+                            else:
+                                if yon == "Satış" and toplam_girilen <= 0:
+                                    st.error("⚠️ Satış için tutar 0'dan büyük olmalıdır!")
+                                    hata = True
+                                elif toplam_girilen >= 0:
+                                    toplam = toplam_girilen
+                                    fiyat = (toplam_girilen / adet) if adet > 0 else 0
+                                    kom = 0
+                                else:
+                                    hata = True
+                            if not hata:
+                                yeni = {
+                                    "Tarih": tarih.strftime("%Y-%m-%d"),
+                                    "Tur": sembol_tur_belirle(kod),
+                                    "Islem": yon, "Sembol": kod, "Adet": adet,
+                                    "Fiyat": fiyat, "Komisyon": kom, "Toplam": toplam
+                                }
+                                with st.spinner("Kaydediliyor..."):
+                                    if save_transaction(yeni):
+                                        st.success("Tamam!")
+                                        st.rerun()
+
+            with col_sil:
+                st.subheader("Sil")
+                try:
+                    df_sil = islem_verisi()
+                    if not df_sil.empty:
+                        st.dataframe(df_sil.tail(5)[["Sembol", "Islem", "Toplam"]], use_container_width=True)
+                        secilen = st.selectbox("ID:", df_sil.index.sort_values(ascending=False))
+                        if st.button("Sil"):
+                            get_storage().satir_sil("Islemler", int(secilen))
+                            sayfa_gecersiz_kil("Islemler")
+                            st.success("Silindi!")
+                            st.rerun()
+                except:
+                    pass
+        elif mod == "Pozisyon Düzelt":
+            if df.empty:
+                st.info("Henüz işlem kaydı yok.")
+            else:
+                duzeltme_islemi_kaydet(ledger_sonucu()[0])
         else:
-            portfolio_tmp, _, _ = calculate_portfolio_unified(df)
-            duzeltme_islemi_kaydet(portfolio_tmp)
+            st.caption("Kolonlar portfolio_transactions.csv ile aynı: Tarih, Tur, Islem, Sembol, Adet, Fiyat, "
+                       "Komisyon, Toplam. Ondalık ayırıcı dosyadan anlaşılır (1.234,56 ya da 1,234.56); "
+                       "Tur boşsa sembolden belirlenir.")
+            dosya = st.file_uploader("Aracı kurum dökümü (CSV / Excel)", type=["csv", "xlsx"])
+            nakit_ekle = st.checkbox("Karşılık gelen nakit hareketlerini de ekle", value=True)
+            if dosya is not None:
+                try:
+                    yeni_islemler, ozet = ice_aktarim_plani(dosya, dosya.name, islem_verisi())
+                except Exception as e:
+                    st.error(f"Dosya okunamadı: {e}")
+                else:
+                    st.info(f"{ozet['okunan']} satır okundu · {ozet['yeni']} yeni · "
+                            f"{ozet['tekrar']} zaten kayıtlı · {ozet['hatali']} geçersiz · "
+                            f"ondalık ayırıcı '{ozet['ondalik'] or '.'}'")
+                    if not yeni_islemler.empty:
+                        st.dataframe(yeni_islemler.head(50), use_container_width=True, hide_index=True)
+                        if st.button(f"{len(yeni_islemler)} İŞLEMİ İÇE AKTAR"):
+                            with st.spinner("Aktarılıyor..."):
+                                try:
+                                    if nakit_ekle:
+                                        nakit_sayfasi_hazirla()
+                                    yazilan = ice_aktar(get_storage(), yeni_islemler, fon_kayitlari(), nakit_ekle)
+                                except Exception as e:
+                                    yazilan = None
+                                    st.error(f"Aktarım yarıda kaldı: {e}. Dosya tekrar yüklenirse yazılmış satırlar atlanır.")
+                                finally:
+                                    sayfa_gecersiz_kil("Islemler", "Fiyatlar", "Nakit")
+                            if yazilan is not None:
+                                st.success(f"✅ {yazilan} işlem aktarıldı.")
+                                st.rerun()
 
 # ================================================================
 with tab2:
-    if st.button("🔄 Yenile"):
-        portfolio_tmp, _, _ = calculate_portfolio_unified(df)
-        active_fund_symbols = {
-            sym for sym, data in portfolio_tmp.items()
-            if data["Adet"] > 0 and data["Tur"] == "Fon"
-        }
-        if not active_fund_symbols:
-            st.info("Güncellenecek aktif fon bulunamadı.")
-        else:
-            with st.spinner("Fon fiyatları Fintables'tan güncelleniyor..."):
-                sonuc = refresh_fund_prices_in_sheet(active_fund_symbols)
-            st.cache_data.clear()
-            st.cache_resource.clear()
-            if sonuc["updated"] > 0:
-                st.success(f"✅ {sonuc['updated']} fon güncellendi.")
+    if tab2.open:
+        if st.button("🔄 Yenile"):
+            active_fund_symbols = {sym for sym, data in acik_pozisyonlar().items() if data["Tur"] == "Fon"}
+            if not active_fund_symbols:
+                st.info("Güncellenecek aktif fon bulunamadı.")
             else:
-                st.warning(f"⚠️ Fiyat alınamadı ({sonuc['failed']} başarısız). Eski fiyatlar korunuyor.")
-        st.rerun()
+                with st.spinner("Fon fiyatları Fintables'tan güncelleniyor..."):
+                    sonuc = refresh_fund_prices_in_sheet(active_fund_symbols)
+                if sonuc["updated"] > 0:
+                    st.success(f"✅ {sonuc['updated']} fon güncellendi.")
+                if sonuc["stale"] or sonuc["failed"]:
+                    st.warning(
+                        f"⚠️ Fiyat alınamadı — süre aşımı: {', '.join(sonuc['eski']) or '-'}, "
+                        f"başarısız: {', '.join(sonuc['basarisiz']) or '-'}. Eski fiyatlar korunuyor."
+                    )
+            # Aktif fon olmasa da sayfalar baştan okunur; kotasyonlar, piyasa geçmişi ve
+            # Sheets bağlantısı korunur
+            get_storage().yenile()
+            sayfa_gecersiz_kil(*OKUNAN_SAYFALAR)
+            st.rerun()
+        canli = st.toggle("⚡ Canlı fiyatlar", key="canli_portfoy",
+                          help=f"Açıkken metrikler ve tablo her {CANLI_ARALIK} saniyede yeniden fiyatlanır")
 
-    if df.empty:
-        st.info("Veri yok.")
-    else:
-        portfolio, t_giren, t_cikan = calculate_portfolio_unified(df)
-        fund_data = get_fund_data_from_sheet()
-        dolar = get_usd_rate()
-        df_nakit = get_nakit_data()
-        nakit_bakiye = get_nakit_bakiye(df_nakit)
-
-        liste = []
-        gunluk_toplam_tl = 0
-        bugun_tarih = datetime.now()
-
-        for sym, data in portfolio.items():
-            net = data["Adet"]
-            if net > 0:
-                em = data["Maliyet"]
-                v_tur = data["Tur"]
-                risk_kalan = data["NetGiris"]
-                alimlar = data["Alimlar"]
-                total_weighted_days = 0
-                for alim in alimlar:
-                    gun_farki = max(1, (bugun_tarih - alim["tarih"]).days)
-                    total_weighted_days += gun_farki * alim["adet"]
-                ort_gun = int(total_weighted_days / net) if net > 0 else 0
-                guncel = 0.0
-                ref_fiyat = 0.0
-                if v_tur == "Hisse":
-                    curr_p, prev_p = get_stock_data_full(sym)
-                    guncel = curr_p if curr_p else 0
-                    ref_fiyat = prev_p if prev_p else guncel
-                else:
-                    f_info = fund_data.get(sym, {"fiyat": 0, "yuzde": 0})
-                    guncel = f_info["fiyat"]
-                    pct = f_info["yuzde"]
-                    if guncel == 0:
-                        guncel = em / net if net > 0 else 0
-                        ref_fiyat = guncel
-                    else:
-                        ref_fiyat = guncel / (1 + (pct / 100))
-
-                deger = float(net * guncel)
-                gf_tl = (guncel - ref_fiyat) * net
-                gf_yuzde = ((guncel - ref_fiyat) / ref_fiyat) * 100 if ref_fiyat > 0 else 0
-                gf_metin = f"{gf_tl:+,.0f} (%{gf_yuzde:+.2f})"
-                gunluk_toplam_tl += gf_tl
-                maliyet_durumu = "BEDAVA" if risk_kalan <= 0 else risk_kalan
-
-                # BEDAVA pozisyonda tüm değer kar sayılır
-                if risk_kalan <= 0:
-                    kz = deger
-                    kz_yuzde = float('inf')
-                else:
-                    kz = deger - em
-                    kz_yuzde = (kz / em) * 100 if em > 0 else 0.0
-
-                liste.append({
-                    "Varlık": sym, "Lot": net,
-                    "Ort. Maliyet": (em / net) if net > 0 else 0,
-                    "Fiyat": guncel, "Kalan Risk (TL)": maliyet_durumu,
-                    "Değer (TL)": deger, "Ort. Süre": f"{ort_gun} Gün",
-                    "K/Z (TL)": float(kz), "K/Z (%)": kz_yuzde,
-                    "Günlük Fark": gf_metin
-                })
-
-        if liste:
-            df_v = pd.DataFrame(liste)
-            toplam_portfoy_degeri = df_v["Değer (TL)"].sum()
-            toplam_maliyet = sum([x["Ort. Maliyet"] * x["Lot"] for x in liste])
-            toplam_servet = toplam_portfoy_degeri + nakit_bakiye
-
-            save_daily_snapshot(toplam_portfoy_degeri, toplam_maliyet, dolar, t_giren - t_cikan, nakit_bakiye)
-            save_asset_snapshots(liste)
-
-            # Anapara = dönüm noktası + sonradan dışarıdan eklenen net para
-            dis_para = get_dis_para_neti(df_nakit)
-            anapara = BASLANGIC_ANAPARA + dis_para
-            genel_kar = toplam_servet - anapara
-            genel_ky = (genel_kar / anapara) * 100 if anapara > 0 else 0
-
-            pie_df = df_v[["Varlık", "Değer (TL)"]].copy()
-            if nakit_bakiye > 0:
-                pie_df = pd.concat([pie_df, pd.DataFrame([{"Varlık": "💵 Nakit", "Değer (TL)": nakit_bakiye}])], ignore_index=True)
-
-            fig_pie = px.pie(pie_df, values="Değer (TL)", names="Varlık", hole=0.45)
-            fig_pie.update_traces(
-                textposition="outside",
-                texttemplate="<b>%{label}</b><br>%{percent:.1%}",
-                hovertemplate="<b>%{label}</b><br>%{value:,.0f} ₺<br>%{percent:.1%}<extra></extra>",
-                pull=[0.03] * len(pie_df),
-            )
-            fig_pie.update_layout(showlegend=False, margin=dict(t=40, b=40, l=40, r=40), height=480)
-            st.plotly_chart(fig_pie, use_container_width=True)
-
-            anlik_kz = toplam_portfoy_degeri - toplam_maliyet
-            anlik_ky = (anlik_kz / toplam_maliyet) * 100 if toplam_maliyet > 0 else 0
+        if df.empty:
+            st.info("Veri yok.")
+        else:
+            df_nakit = nakit_verisi()
+            nakit_bakiye = nakit_bakiyesi()
+
+            liste, _ = degerleme()
+            gunluk_kayitlari_kuyrukla(liste)
+
+            if liste:
+                df_v = pd.DataFrame(liste)
+                pie_df = df_v[["Varlık", "Değer (TL)"]].copy()
+                if nakit_bakiye > 0:
+                    pie_df = pd.concat([pie_df, pd.DataFrame([{"Varlık": "💵 Nakit", "Değer (TL)": nakit_bakiye}])], ignore_index=True)
+
+                with profiler.olc("plotly:dagilim"):
+                    fig_pie = px.pie(pie_df, values="Değer (TL)", names="Varlık", hole=0.45)
+                    fig_pie.update_traces(
+                        textposition="outside",
+                        texttemplate="<b>%{label}</b><br>%{percent:.1%}",
+                        hovertemplate="<b>%{label}</b><br>%{value:,.0f} ₺<br>%{percent:.1%}<extra></extra>",
+                        pull=[0.03] * len(pie_df),
+                    )
+                    fig_pie.update_layout(showlegend=False, margin=dict(t=40, b=40, l=40, r=40), height=480)
+                    st.plotly_chart(fig_pie, use_container_width=True)
+
+                # Anapara = dönüm noktası + sonradan dışarıdan eklenen net para
+                anapara = BASLANGIC_ANAPARA + get_dis_para_neti(df_nakit)
+
+                # Canlı modda sadece bu bölüm yeniden çizilir: ledger, fon fiyatları ve nakit
+                # tam çalışmadan gelir, hisse fiyatları her tikte ortak depodan tekrar okunur.
+                # Tam çalışmada değerleme düğümü pasta grafiğiyle paylaşılır; tiklerde
+                # (ilk sözlüğü boşalmışken) sadece o düğüm yeniden hesaplanır
+                @st.fragment(run_every=CANLI_ARALIK if canli else None)
+                def portfoy_canli(nakit_bakiye, anapara, ilk):
+                    if not ilk.pop("tam_calisma", False):
+                        dugum_gecersiz_kil("degerleme")
+                    liste, gunluk_toplam_tl = degerleme()
+                    if not liste:
+                        return
+                    df_v = pd.DataFrame(liste)
+                    toplam_portfoy_degeri = df_v["Değer (TL)"].sum()
+                    toplam_maliyet = sum([x["Ort. Maliyet"] * x["Lot"] for x in liste])
+                    toplam_servet = toplam_portfoy_degeri + nakit_bakiye
+                    dolar = get_usd_rate()
+                    genel_kar = toplam_servet - anapara
+                    genel_ky = (genel_kar / anapara) * 100 if anapara > 0 else 0
+
+                    anlik_kz = toplam_portfoy_degeri - toplam_maliyet
+                    anlik_ky = (anlik_kz / toplam_maliyet) * 100 if toplam_maliyet > 0 else 0
+
+                    k0, k1, k2, k3 = st.columns(4)
+                    k0.metric("Toplam Servet", f"{toplam_servet:,.0f} ₺", f"${toplam_servet/dolar:,.0f}", delta_color="off")
+                    k1.metric("Portföy Değeri", f"{toplam_portfoy_degeri:,.0f} ₺")
+                    k2.metric("Nakit", f"{nakit_bakiye:,.0f} ₺")
+                    k3.metric("Anlık K/Z", f"{anlik_kz:+,.0f} ₺", f"%{anlik_ky:.1f}")
+
+                    st.divider()
+
+                    k4, k5, k6 = st.columns(3)
+                    k4.metric("Günlük Fark", f"{gunluk_toplam_tl:+,.0f} ₺")
+                    k5.metric("Borsadaki Maliyet", f"{toplam_maliyet:,.0f} ₺", "Eldeki varlıkların alış maliyeti", delta_color="off")
+                    k6.metric("GENEL KAR", f"{genel_kar:+,.0f} ₺", f"%{genel_ky:.1f} (Ana Paraya Göre)")
+
+                    st.divider()
+                    st.subheader("📋 Portföy Detayı")
+
+                    def format_risk(val):
+                        if isinstance(val, (int, float)):
+                            return f"{val:,.0f}"
+                        return val
+
+                    def format_kz_pct(val):
+                        if val == float('inf'):
+                            return "BEDAVA 🎁"
+                        if isinstance(val, (int, float)):
+                            return f"{val:+.2f} %"
+                        return str(val)
+
+                    cfg = {
+                        "Varlık": st.column_config.TextColumn("Varlık", disabled=True),
+                        "Lot": st.column_config.NumberColumn("Lot", format="%.0f"),
+                        "Ort. Maliyet": st.column_config.NumberColumn("Ort. Maliyet", format="%.4f"),
+                        "Fiyat": st.column_config.NumberColumn("Fiyat", format="%.4f"),
+                        "Güncellik": st.column_config.TextColumn("Güncellik", disabled=True),
+                        "Kalan Risk (TL)": st.column_config.Column("Kalan Risk", disabled=True),
+                        "Değer (TL)": st.column_config.NumberColumn("Değer (TL)", format="%.0f"),
+                        "Ort. Süre": st.column_config.TextColumn("Elde Tutma"),
+                        "K/Z (TL)": st.column_config.NumberColumn("K/Z (TL)", format="%.0f"),
+                        "K/Z (%)": st.column_config.TextColumn("K/Z (%)", disabled=True),
+                        "Günlük Fark": st.column_config.TextColumn("Günlük", disabled=True)
+                    }
+
+                    st.dataframe(
+                        df_v.style.format({
+                            "Ort. Maliyet": "{:,.4f}", "Fiyat": "{:,.4f}",
+                            "Değer (TL)": "{:,.0f}", "K/Z (TL)": "{:+,.0f}",
+                        }).format({
+                            "Kalan Risk (TL)": format_risk,
+                            "K/Z (%)": format_kz_pct,
+                        }).map(renk, subset=["K/Z (TL)", "K/Z (%)", "Günlük Fark"]),
+                        use_container_width=True, hide_index=True, column_config=cfg
+                    )
+
+                portfoy_canli(nakit_bakiye, anapara, {"tam_calisma": True})
+
+                with st.expander("⏳ Lot Yaşı"):
+                    # Açık pozisyonların kalan adetleri alış tarihine göre yaş aralıklarına dağılır
+                    kovalar = yas_kovasi_adlari()
+                    bugun_tarih = datetime.now()
+                    df_yas = pd.DataFrame(
+                        [[sym, *data["Alimlar"].yas_kovalari(bugun_tarih)] for sym, data in acik_pozisyonlar().items()],
+                        columns=["Varlık", *kovalar],
+                    )
+                    st.dataframe(df_yas.style.format("{:,.2f}", subset=kovalar),
+                                 use_container_width=True, hide_index=True)
 
-            k0, k1, k2, k3 = st.columns(4)
-            k0.metric("Toplam Servet", f"{toplam_servet:,.0f} ₺", f"${toplam_servet/dolar:,.0f}", delta_color="off")
-            k1.metric("Portföy Değeri", f"{toplam_portfoy_degeri:,.0f} ₺")
-            k2.metric("Nakit", f"{nakit_bakiye:,.0f} ₺")
-            k3.metric("Anlık K/Z", f"{anlik_kz:+,.0f} ₺", f"%{anlik_ky:.1f}")
+# ================================================================
+with tab3:
+    if tab3.open:
+        st.subheader("💵 Nakit Takibi")
+        df_nakit = nakit_verisi()
+        nakit_bakiye = nakit_bakiyesi()
+
+        renk_bakiye = "#2ecc71" if nakit_bakiye >= 0 else "#e74c3c"
+        st.markdown(f"""
+        <div style="background:#1e1e1e;border-radius:12px;padding:20px 28px;display:inline-block;margin-bottom:16px;">
+            <div style="color:#aaa;font-size:14px;">Güncel Nakit Bakiye</div>
+            <div style="color:{renk_bakiye};font-size:32px;font-weight:bold;">{nakit_bakiye:,.0f} ₺</div>
+        </div>
+        """, unsafe_allow_html=True)
+
+        col_giris, _ = st.columns([2, 1])
+        with col_giris:
+            with st.form("nakit_form", clear_on_submit=True):
+                st.markdown("**Yeni Hareket Ekle**")
+                nc1, nc2 = st.columns(2)
+                n_tarih = nc1.date_input("Tarih", datetime.now(), key="n_tarih")
+                n_tip = nc2.radio("Tip", ["Giriş", "Çıkış"], horizontal=True)
+                n_tutar = st.number_input("Tutar (₺)", min_value=0.0, format="%.2f")
+                n_aciklama = st.text_input("Açıklama (opsiyonel)", placeholder="Maaş, harcama, fon satışı...")
+                if st.form_submit_button("EKLE"):
+                    if n_tutar > 0:
+                        with st.spinner("Kaydediliyor..."):
+                            save_nakit(n_tarih.strftime("%Y-%m-%d"), n_aciklama, n_tutar, n_tip)
+                            st.success("Tamam!")
+                            st.rerun()
+                    else:
+                        st.error("Tutar 0'dan büyük olmalıdır.")
 
-            st.divider()
+        st.divider()
 
-            k4, k5, k6 = st.columns(3)
-            k4.metric("Günlük Fark", f"{gunluk_toplam_tl:+,.0f} ₺")
-            k5.metric("Borsadaki Maliyet", f"{toplam_maliyet:,.0f} ₺", "Eldeki varlıkların alış maliyeti", delta_color="off")
-            k6.metric("GENEL KAR", f"{genel_kar:+,.0f} ₺", f"%{genel_ky:.1f} (Ana Paraya Göre)")
+        if not df_nakit.empty:
+            df_nakit_sorted = df_nakit.sort_values("Tarih").copy()
+            df_nakit_sorted["NetTutar"] = df_nakit_sorted.apply(
+                lambda r: r["Tutar"] if r["Tip"] == "Giriş" else -r["Tutar"], axis=1
+            )
+            df_nakit_sorted["Bakiye"] = df_nakit_sorted["NetTutar"].cumsum()
+
+            with profiler.olc("plotly:nakit"):
+                fg = go.Figure()
+                fg.add_trace(go.Scatter(
+                    x=df_nakit_sorted["Tarih"], y=df_nakit_sorted["Bakiye"],
+                    name="Nakit Bakiye", line=dict(color="#f1c40f", width=3),
+                    fill="tozeroy", fillcolor="rgba(241,196,15,0.1)"
+                ))
+                fg.update_layout(title="Nakit Bakiye Gidişatı", hovermode="x unified", height=300)
+                st.plotly_chart(fg, use_container_width=True)
 
             st.divider()
-            st.subheader("📋 Portföy Detayı")
-
-            def format_risk(val):
-                if isinstance(val, (int, float)):
-                    return f"{val:,.0f}"
-                return val
-
-            def format_kz_pct(val):
-                if val == float('inf'):
-                    return "BEDAVA 🎁"
-                if isinstance(val, (int, float)):
-                    return f"{val:+.2f} %"
-                return str(val)
-
-            cfg = {
-                "Varlık": st.column_config.TextColumn("Varlık", disabled=True),
-                "Lot": st.column_config.NumberColumn("Lot", format="%.0f"),
-                "Ort. Maliyet": st.column_config.NumberColumn("Ort. Maliyet", format="%.4f"),
-                "Fiyat": st.column_config.NumberColumn("Fiyat", format="%.4f"),
-                "Kalan Risk (TL)": st.column_config.Column("Kalan Risk", disabled=True),
-                "Değer (TL)": st.column_config.NumberColumn("Değer (TL)", format="%.0f"),
-                "Ort. Süre": st.column_config.TextColumn("Elde Tutma"),
-                "K/Z (TL)": st.column_config.NumberColumn("K/Z (TL)", format="%.0f"),
-                "K/Z (%)": st.column_config.TextColumn("K/Z (%)", disabled=True),
-                "Günlük Fark": st.column_config.TextColumn("Günlük", disabled=True)
-            }
-
-            st.dataframe(
-                df_v.style.format({
-                    "Ort. Maliyet": "{:,.4f}", "Fiyat": "{:,.4f}",
-                    "Değer (TL)": "{:,.0f}", "K/Z (TL)": "{:+,.0f}",
-                }).format({
-                    "Kalan Risk (TL)": format_risk,
-                    "K/Z (%)": format_kz_pct,
-                }).map(renk, subset=["K/Z (TL)", "K/Z (%)", "Günlük Fark"]),
-                use_container_width=True, hide_index=True, column_config=cfg
-            )
+            st.subheader("📋 Nakit Hareketleri")
+
+            df_goster = df_nakit_sorted[["Tarih", "Aciklama", "Tip", "Tutar"]].copy()
+            df_goster = df_goster.sort_values("Tarih", ascending=False)
+            df_goster["Tarih"] = df_goster["Tarih"].dt.strftime("%Y-%m-%d")
+
+            col_tablo, col_sil2 = st.columns([3, 1])
+            with col_tablo:
+                st.dataframe(
+                    df_goster.style.format({"Tutar": "{:,.2f} ₺"}).map(
+                        lambda v: "color:#2ecc71;font-weight:bold" if v == "Giriş" else "color:#e74c3c;font-weight:bold",
+                        subset=["Tip"]
+                    ),
+                    use_container_width=True, hide_index=True
+                )
+            with col_sil2:
+                st.markdown("**Satır Sil**")
+                sil_idx = st.selectbox("ID:", df_nakit.index.sort_values(ascending=False), key="nakit_sil")
+                if st.button("Sil", key="nakit_sil_btn"):
+                    delete_nakit_row(int(sil_idx))
+                    st.success("Silindi!")
+                    st.rerun()
+        else:
+            st.info("Henüz nakit hareketi girilmemiş.")
 
 # ================================================================
-with tab3:
-    st.subheader("💵 Nakit Takibi")
-    df_nakit = get_nakit_data()
-    nakit_bakiye = get_nakit_bakiye(df_nakit)
-
-    renk_bakiye = "#2ecc71" if nakit_bakiye >= 0 else "#e74c3c"
-    st.markdown(f"""
-    <div style="background:#1e1e1e;border-radius:12px;padding:20px 28px;display:inline-block;margin-bottom:16px;">
-        <div style="color:#aaa;font-size:14px;">Güncel Nakit Bakiye</div>
-        <div style="color:{renk_bakiye};font-size:32px;font-weight:bold;">{nakit_bakiye:,.0f} ₺</div>
-    </div>
-    """, unsafe_allow_html=True)
-
-    col_giris, _ = st.columns([2, 1])
-    with col_giris:
-        with st.form("nakit_form", clear_on_submit=True):
-            st.markdown("**Yeni Hareket Ekle**")
-            nc1, nc2 = st.columns(2)
-            n_tarih = nc1.date_input("Tarih", datetime.now(), key="n_tarih")
-            n_tip = nc2.radio("Tip", ["Giriş", "Çıkış"], horizontal=True)
-            n_tutar = st.number_input("Tutar (₺)", min_value=0.0, format="%.2f")
-            n_aciklama = st.text_input("Açıklama (opsiyonel)", placeholder="Maaş, harcama, fon satışı...")
-            if st.form_submit_button("EKLE"):
-                if n_tutar > 0:
-                    with st.spinner("Kaydediliyor..."):
-                        save_nakit(n_tarih.strftime("%Y-%m-%d"), n_aciklama, n_tutar, n_tip)
-                        st.success("Tamam!")
-                        st.cache_data.clear()
-                        st.rerun()
-                else:
-                    st.error("Tutar 0'dan büyük olmalıdır.")
-
-    st.divider()
+with tab4:
+    if tab4.open:
+        st.subheader("📈 Gidişat")
+        df_hist = gidisat_verisi()
+        if not df_hist.empty:
+            df_hist["GenelKar"] = df_hist["ToplamVarlik"] - df_hist["NetAnaPara"]
+            df_hist["AnlikKar"] = df_hist.apply(
+                lambda r: r["ToplamVarlik"] - r["ToplamMaliyet"] if r["ToplamMaliyet"] > 100 else 0, axis=1
+            )
+            df_hist["ToplamServet"] = df_hist["ToplamVarlik"] + df_hist["Nakit"]
+            df_nakit_var = df_hist[df_hist["Nakit"] > 0].copy()
+
+            with profiler.olc("plotly:servet"):
+                f1 = go.Figure()
+                f1.add_trace(go.Scatter(x=df_hist["Tarih"], y=df_hist["ToplamVarlik"],
+                                        name="Portföy Değeri", line=dict(color="#3498db", width=2)))
+                if not df_nakit_var.empty:
+                    f1.add_trace(go.Scatter(x=df_nakit_var["Tarih"], y=df_nakit_var["ToplamServet"],
+                                            name="Toplam Servet (Nakit Dahil)", line=dict(color="#2ecc71", width=3)))
+                f1.add_trace(go.Scatter(x=df_hist["Tarih"], y=df_hist["NetAnaPara"],
+                                        name="İçerideki Ana Para", line=dict(color="gray", dash="dot")))
+                f1.update_layout(title="Toplam Servet vs Portföy vs Ana Para", hovermode="x unified")
+                st.plotly_chart(f1, use_container_width=True)
 
-    if not df_nakit.empty:
-        df_nakit_sorted = df_nakit.sort_values("Tarih").copy()
-        df_nakit_sorted["NetTutar"] = df_nakit_sorted.apply(
-            lambda r: r["Tutar"] if r["Tip"] == "Giriş" else -r["Tutar"], axis=1
-        )
-        df_nakit_sorted["Bakiye"] = df_nakit_sorted["NetTutar"].cumsum()
+            st.divider()
 
-        fg = go.Figure()
-        fg.add_trace(go.Scatter(
-            x=df_nakit_sorted["Tarih"], y=df_nakit_sorted["Bakiye"],
-            name="Nakit Bakiye", line=dict(color="#f1c40f", width=3),
-            fill="tozeroy", fillcolor="rgba(241,196,15,0.1)"
-        ))
-        fg.update_layout(title="Nakit Bakiye Gidişatı", hovermode="x unified", height=300)
-        st.plotly_chart(fg, use_container_width=True)
+            with profiler.olc("plotly:kar"):
+                f2 = go.Figure()
+                f2.add_trace(go.Scatter(x=df_hist["Tarih"], y=df_hist["GenelKar"],
+                                        name="GENEL KÂR (Cepteki Dahil)", line=dict(color="#3498db", width=3)))
+                f2.add_trace(go.Scatter(x=df_hist["Tarih"], y=df_hist["AnlikKar"],
+                                        name="ANLIK KÂR (Sadece Eldekiler)", line=dict(color="#f1c40f", width=2, dash="dash")))
+                f2.update_layout(title="Kâr Analizi: Genel vs Anlık", hovermode="x unified")
+                st.plotly_chart(f2, use_container_width=True)
+        else:
+            st.info("Genel veri toplanıyor...")
 
         st.divider()
-        st.subheader("📋 Nakit Hareketleri")
 
-        df_goster = df_nakit_sorted[["Tarih", "Aciklama", "Tip", "Tutar"]].copy()
-        df_goster = df_goster.sort_values("Tarih", ascending=False)
-        df_goster["Tarih"] = df_goster["Tarih"].dt.strftime("%Y-%m-%d")
+        df_assets = varlik_gidisati()
+        if not df_assets.empty and len(df_assets.columns) > 1:
+            st.subheader("📊 Varlık Bazında Kâr/Zarar (%) Gidişatı")
+            st.info("💡 Not: Günlük kaydı olmayan günler işlemlerden ve kapanış fiyatlarından yeniden hesaplanır.")
+            aktif_semboller = list(acik_pozisyonlar())
+            gosterilecek_kolonlar = ["Tarih"] + [c for c in df_assets.columns if c in aktif_semboller]
+            if len(gosterilecek_kolonlar) > 1:
+                df_assets_aktif = df_assets[gosterilecek_kolonlar]
+                df_melted = df_assets_aktif.melt(id_vars=["Tarih"], var_name="Varlık", value_name="K/Z (%)")
+                with profiler.olc("plotly:varlik"):
+                    f3 = px.line(df_melted, x="Tarih", y="K/Z (%)", color="Varlık", markers=True)
+                    f3.add_hline(y=0, line_dash="dash", line_color="red")
+                    f3.update_layout(hovermode="x unified", yaxis_title="Kâr / Zarar (%)")
+                    st.plotly_chart(f3, use_container_width=True)
+            else:
+                st.warning("Grafiği çizilecek aktif varlık bulunamadı.")
 
-        col_tablo, col_sil2 = st.columns([3, 1])
-        with col_tablo:
+        st.divider()
+        st.subheader("📅 Tarihteki Portföy")
+        secilen_tarih = st.date_input("Gün sonu itibarıyla", datetime.now(), key="tarihteki_portfoy")
+        o_gun, o_giren, o_cikan, o_nakit = zaman_indeksi().durum(secilen_tarih)
+        o_gun_acik = [
+            {"Varlık": sym, "Tür": p["Tur"], "Lot": p["Adet"], "Maliyet (TL)": p["Maliyet"],
+             "Ort. Maliyet": p["Maliyet"] / p["Adet"], "Kalan Risk (TL)": p["NetGiris"]}
+            for sym, p in o_gun.items() if p["Adet"] > 0
+        ]
+        t1, t2, t3 = st.columns(3)
+        t1.metric("Borsadaki Maliyet", f"{sum(x['Maliyet (TL)'] for x in o_gun_acik):,.0f} ₺")
+        t2.metric("Nakit", f"{o_nakit:,.0f} ₺")
+        t3.metric("İçerideki Ana Para", f"{o_giren - o_cikan:,.0f} ₺")
+        if o_gun_acik:
             st.dataframe(
-                df_goster.style.format({"Tutar": "{:,.2f} ₺"}).map(
-                    lambda v: "color:#2ecc71;font-weight:bold" if v == "Giriş" else "color:#e74c3c;font-weight:bold",
-                    subset=["Tip"]
-                ),
+                pd.DataFrame(o_gun_acik).style.format({
+                    "Lot": "{:,.0f}", "Maliyet (TL)": "{:,.2f}", "Ort. Maliyet": "{:,.4f}", "Kalan Risk (TL)": "{:,.2f}"
+                }),
                 use_container_width=True, hide_index=True
             )
-        with col_sil2:
-            st.markdown("**Satır Sil**")
-            sil_idx = st.selectbox("ID:", df_nakit.index.sort_values(ascending=False), key="nakit_sil")
-            if st.button("Sil", key="nakit_sil_btn"):
-                delete_nakit_row(int(sil_idx))
-                st.success("Silindi!")
-                st.cache_data.clear()
-                st.rerun()
-    else:
-        st.info("Henüz nakit hareketi girilmemiş.")
-
-# ================================================================
-with tab4:
-    st.subheader("📈 Gidişat")
-    df_hist = get_history_data()
-    if not df_hist.empty:
-        df_hist["GenelKar"] = df_hist["ToplamVarlik"] - df_hist["NetAnaPara"]
-        df_hist["AnlikKar"] = df_hist.apply(
-            lambda r: r["ToplamVarlik"] - r["ToplamMaliyet"] if r["ToplamMaliyet"] > 100 else 0, axis=1
-        )
-        df_hist["ToplamServet"] = df_hist["ToplamVarlik"] + df_hist["Nakit"]
-        df_nakit_var = df_hist[df_hist["Nakit"] > 0].copy()
-
-        f1 = go.Figure()
-        f1.add_trace(go.Scatter(x=df_hist["Tarih"], y=df_hist["ToplamVarlik"],
-                                name="Portföy Değeri", line=dict(color="#3498db", width=2)))
-        if not df_nakit_var.empty:
-            f1.add_trace(go.Scatter(x=df_nakit_var["Tarih"], y=df_nakit_var["ToplamServet"],
-                                    name="Toplam Servet (Nakit Dahil)", line=dict(color="#2ecc71", width=3)))
-        f1.add_trace(go.Scatter(x=df_hist["Tarih"], y=df_hist["NetAnaPara"],
-                                name="İçerideki Ana Para", line=dict(color="gray", dash="dot")))
-        f1.update_layout(title="Toplam Servet vs Portföy vs Ana Para", hovermode="x unified")
-        st.plotly_chart(f1, use_container_width=True)
-
-        st.divider()
-
-        f2 = go.Figure()
-        f2.add_trace(go.Scatter(x=df_hist["Tarih"], y=df_hist["GenelKar"],
-                                name="GENEL KÂR (Cepteki Dahil)", line=dict(color="#3498db", width=3)))
-        f2.add_trace(go.Scatter(x=df_hist["Tarih"], y=df_hist["AnlikKar"],
-                                name="ANLIK KÂR (Sadece Eldekiler)", line=dict(color="#f1c40f", width=2, dash="dash")))
-        f2.update_layout(title="Kâr Analizi: Genel vs Anlık", hovermode="x unified")
-        st.plotly_chart(f2, use_container_width=True)
-    else:
-        st.info("Genel veri toplanıyor...")
-
-    st.divider()
-
-    df_assets = get_asset_history()
-    if not df_assets.empty and len(df_assets.columns) > 1:
-        st.subheader("📊 Varlık Bazında Kâr/Zarar (%) Gidişatı")
-        st.info("💡 Not: Grafik bugünden itibaren her gün varlıkların kapanış performansını işleyerek ilerleyecektir.")
-        portfolio_gidisat, _, _ = calculate_portfolio_unified(df)
-        aktif_semboller = [sym for sym, d in portfolio_gidisat.items() if d["Adet"] > 0]
-        gosterilecek_kolonlar = ["Tarih"] + [c for c in df_assets.columns if c in aktif_semboller]
-        if len(gosterilecek_kolonlar) > 1:
-            df_assets_aktif = df_assets[gosterilecek_kolonlar]
-            df_melted = df_assets_aktif.melt(id_vars=["Tarih"], var_name="Varlık", value_name="K/Z (%)")
-            f3 = px.line(df_melted, x="Tarih", y="K/Z (%)", color="Varlık", markers=True)
-            f3.add_hline(y=0, line_dash="dash", line_color="red")
-            f3.update_layout(hovermode="x unified", yaxis_title="Kâr / Zarar (%)")
-            st.plotly_chart(f3, use_container_width=True)
         else:
-            st.warning("Grafiği çizilecek aktif varlık bulunamadı.")
+            st.info("Bu tarihte açık pozisyon yok.")
 
 # ================================================================
 with tab5:
-    st.dataframe(
-        df.sort_index(ascending=False).style.format({
-            "Fiyat": "{:,.4f}", "Toplam": "{:,.2f}",
-            "Komisyon": "{:,.2f}", "Adet": "{:.0f}"
-        }),
-        use_container_width=True
+    if tab5.open:
+        st.dataframe(
+            df.sort_index(ascending=False).style.format({
+                "Fiyat": "{:,.4f}", "Toplam": "{:,.2f}",
+                "Komisyon": "{:,.2f}", "Adet": "{:.0f}"
+            }),
+            use_container_width=True
+        )
+
+okunamayan_toplam = {}
+for (sayfa, _), adet in _okunamayan_hucre.items():
+    okunamayan_toplam[sayfa] = okunamayan_toplam.get(sayfa, 0) + adet
+okunamayan_metin = ", ".join(f"{sayfa}: {adet}" for sayfa, adet in okunamayan_toplam.items() if adet)
+if okunamayan_metin:
+    st.sidebar.caption(f"⚠️ Sayıya çevrilemeyen hücreler (0 sayıldı) — {okunamayan_metin}")
+
+if STORAGE_BACKEND != "local":
+    kota = sheetsclient.kota_durumu()
+    st.sidebar.caption(
+        f"📗 Sheets son dakika: okuma {kota['okuma']}/{kota['okuma_kotasi']:.0f} · "
+        f"yazma {kota['yazma']}/{kota['yazma_kotasi']:.0f} · 429: {kota['kota_asimi']} · "
+        f"tekrar: {kota['tekrar']} · birleşen: {kota['birlesen']}"
     )
+if get_storage().son_hata:
+    st.sidebar.caption(f"⚠️ Sheets'e ulaşılamadı, son senkron edilen kopya gösteriliyor: {get_storage().son_hata}")
+
+if st.sidebar.toggle("⏱️ Profil paneli", key="profil_paneli"):
+    olcumler, servisler = profiler.istatistikler()
+    with st.sidebar.expander("Bu çalıştırma", expanded=True):
+        st.caption(f"Toplam {(time.time() - _calisma_baslangici) * 1000:,.0f} ms")
+        bu_calisma = profiler.calisma_olcumleri(_calisma_baslangici)
+        if bu_calisma:
+            st.dataframe(pd.DataFrame([
+                {"Aşama": o["ad"], "ms": o["sure"] * 1000, "API": o["cagri"], "KB": o["bayt"] / 1024}
+                for o in bu_calisma
+            ]).style.format({"ms": "{:,.1f}", "KB": "{:,.1f}"}), hide_index=True)
+    with st.sidebar.expander("Süreç toplamı"):
+        if olcumler:
+            st.dataframe(pd.DataFrame([
+                {"Aşama": ad, "Sayı": s["sayi"], "Ort. ms": s["toplam"] / s["sayi"] * 1000,
+                 "Son ms": s["son"] * 1000, "En uzun ms": s["en_uzun"] * 1000,
+                 "API": s["cagri"], "KB": s["bayt"] / 1024}
+                for ad, s in sorted(olcumler.items(), key=lambda x: -x[1]["toplam"])
+            ]).style.format({"Ort. ms": "{:,.1f}", "Son ms": "{:,.1f}", "En uzun ms": "{:,.1f}", "KB": "{:,.1f}"}),
+                hide_index=True)
+        st.caption(" · ".join(
+            f"{servis}: {s['cagri']} çağrı, {s['bayt'] / 1024:,.0f} KB" for servis, s in servisler.items()
+        ) or "Henüz dış API çağrısı yok")
+
+hesaplanan = [ad for ad, r in _dugum_raporu.items() if r["hesaplanan"]]
+isabetler = [f"{ad} ×{r['isabet']}" for ad, r in _dugum_raporu.items() if r["isabet"]]
+st.sidebar.caption(
+    f"🧮 Hesaplanan: {', '.join(hesaplanan) or '-'} · Önbellekten: {', '.join(isabetler) or '-'}"
+)
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+from ledger import ledger_durumlari
+
+NAT_NS = np.iinfo(np.int64).min
+
+
+def gun_araligi(df, bitis=None):
+    tarihler = df["Tarih"].dropna()
+    if tarihler.empty:
+        return pd.DatetimeIndex([])
+    bitis = pd.Timestamp(bitis) if bitis is not None else pd.Timestamp.now()
+    return pd.date_range(tarihler.min().normalize(), bitis.normalize(), freq="D")
+
+
+def _gunluk_son(gunler, gun, sembol, deger, semboller):
+    # Aynı gün aynı sembolün son değeri alınır; tarih x sembol tablosu (boş günler NaN)
+    cerceve = pd.DataFrame({"Gun": gun, "Sembol": sembol, "Deger": deger})
+    tablo = cerceve.groupby(["Gun", "Sembol"], sort=False)["Deger"].last().unstack()
+    return tablo.reindex(index=gunler, columns=semboller)
+
+
+def pozisyon_matrisi(df, gunler, semboller):
+    # Ledger satır satır bir kez oynatılır (toz ve fazla satış sıfırlamaları dahil);
+    # her günün son durumu ileri doldurularak tarih x sembol adet ve maliyet tabloları çıkar
+    d, durumlar = ledger_durumlari(df)
+    gecerli = d["Tarih"] != NAT_NS
+    gun = pd.to_datetime(d["Tarih"][gecerli], unit="ns").normalize()
+    sembol = d["Sembol"][gecerli]
+    adet = _gunluk_son(gunler, gun, sembol, durumlar[gecerli, 0], semboller).ffill().fillna(0.0)
+    maliyet = _gunluk_son(gunler, gun, sembol, durumlar[gecerli, 1], semboller).ffill().fillna(0.0)
+    return d, gecerli, adet, maliyet
+
+
+def fiyat_matrisi(df, gunler, semboller, kapanislar=None, guncel=None):
+    # İşlem fiyatları gözlem noktasıdır; piyasa kapanışı olan günlerde kapanış önceliklidir,
+    # guncel (sembol -> fiyat) son güne yazılır. Aradaki günler ileri doldurulur
+    f = df[df["Tarih"].notna() & (df["Fiyat"] > 0)]
+    gozlem = _gunluk_son(gunler, f["Tarih"].dt.normalize(), f["Sembol"].to_numpy(), f["Fiyat"].to_numpy(), semboller)
+    if kapanislar is not None and not kapanislar.empty:
+        piyasa = kapanislar.copy()
+        piyasa.index = pd.DatetimeIndex(piyasa.index).normalize()
+        piyasa = piyasa[~piyasa.index.duplicated(keep="last")].reindex(index=gunler, columns=semboller)
+        gozlem = piyasa.combine_first(gozlem)
+    if guncel and len(gunler):
+        for sym, fiyat in guncel.items():
+            if fiyat and fiyat > 0 and sym in gozlem.columns:
+                gozlem.loc[gunler[-1], sym] = fiyat
+    return gozlem.ffill()
+
+
+def yeniden_olustur(df, kapanislar=None, guncel=None, nakit=None, bitis=None):
+    # Günlük (ToplamVarlik, ToplamMaliyet, NetAnaPara, Nakit) serisi ve varlık bazında K/Z %
+    # tablosu tek vektörel geçişte hesaplanır
+    if df.empty or "Tarih" not in df.columns:
+        return pd.DataFrame(), pd.DataFrame()
+    df = df.sort_values("Tarih", kind="mergesort")
+    gunler = gun_araligi(df, bitis)
+    if not len(gunler):
+        return pd.DataFrame(), pd.DataFrame()
+    semboller = list(dict.fromkeys(df["Sembol"].tolist()))
+    d, gecerli, adet, maliyet = pozisyon_matrisi(df, gunler, semboller)
+    fiyat = fiyat_matrisi(df, gunler, semboller, kapanislar, guncel)
+
+    A, M, F = adet.to_numpy(), maliyet.to_numpy(), fiyat.to_numpy()
+    acik = A > 0
+    # Fiyatı hiç bilinmeyen açık pozisyon maliyetinden değerlenir (PORTFÖY'deki gibi)
+    deger = np.where(acik, np.where(np.isnan(F), M, A * F), 0.0)
+    maliyet_acik = np.where(acik, M, 0.0)
+    kz = np.full(A.shape, np.nan)
+    np.divide((deger - maliyet_acik) * 100, maliyet_acik, out=kz, where=acik & (maliyet_acik > 0))
+
+    isaret = np.where(d["Islem"] == "ALIS", 1.0, np.where(d["Islem"] == "SATIS", -1.0, 0.0))
+    net_giris = (
+        pd.Series(isaret[gecerli] * d["Toplam"][gecerli], index=pd.to_datetime(d["Tarih"][gecerli], unit="ns").normalize())
+        .groupby(level=0).sum().reindex(gunler, fill_value=0.0).cumsum()
+    )
+
+    nakit_serisi = pd.Series(0.0, index=gunler)
+    if nakit is not None and not nakit.empty:
+        n = nakit.dropna(subset=["Tarih"])
+        tutar = np.where(n["Tip"] == "Giriş", n["Tutar"], np.where(n["Tip"] == "Çıkış", -n["Tutar"], 0.0))
+        gunluk = pd.Series(tutar, index=n["Tarih"].dt.normalize()).groupby(level=0).sum().cumsum()
+        nakit_serisi = gunluk.reindex(gunler, method="ffill").fillna(0.0)
+
+    gunluk = pd.DataFrame({
+        "Tarih": gunler,
+        "ToplamVarlik": deger.sum(axis=1),
+        "ToplamMaliyet": maliyet_acik.sum(axis=1),
+        "NetAnaPara": net_giris.to_numpy(),
+        "Nakit": nakit_serisi.to_numpy(),
+    })
+    varlik = pd.DataFrame(kz, index=gunler, columns=semboller).rename_axis("Tarih").reset_index()
+    return gunluk, varlik
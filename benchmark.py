@@ -0,0 +1,199 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+import mirror
+import sayfalar
+import snapshots
+import valuation
+from backfill import yeniden_olustur
+from ledger import ZamanIndeksi, calculate_portfolio_unified
+from storage import LocalStorage
+
+SONUC_DOSYASI = ".benchmark_results.jsonl"
+ILK_GUN = date(2020, 1, 2)
+# Önceki ölçümün bu katından yavaş aşamalar gerileme olarak işaretlenir
+GERILEME_ESIGI = 1.2
+
+
+def _virgullu(degerler):
+    # Sheets'teki gibi ondalık ayırıcı virgül
+    return [mirror.hucre(float(v)) for v in degerler]
+
+
+def sentetik_veri(islem_sayisi, sembol_sayisi, gun_sayisi=1500, tohum=0):
+    # Beş sayfanın ham satırları (başlık dahil, hücreler metin)
+    rng = np.random.default_rng(tohum)
+    fon_sayisi = max(1, sembol_sayisi // 5)
+    hisseler = [f"H{i:04d}" for i in range(sembol_sayisi - fon_sayisi)]
+    fonlar = [f"F{i:03d}" for i in range(fon_sayisi)]
+    semboller = np.array(hisseler + fonlar)
+    turler = np.array(["Hisse"] * len(hisseler) + ["Fon"] * len(fonlar))
+
+    gunler = np.array([(ILK_GUN + timedelta(days=int(g))).isoformat() for g in range(gun_sayisi)])
+    sec = rng.integers(0, len(semboller), islem_sayisi)
+    tarih = gunler[np.sort(rng.integers(0, gun_sayisi, islem_sayisi))]
+    islem = np.where(rng.random(islem_sayisi) < 0.65, "Alis", "Satis")
+    adet = rng.integers(1, 1000, islem_sayisi)
+    fiyat = np.round(rng.uniform(1, 500, islem_sayisi), 2)
+    toplam = np.round(adet * fiyat, 2)
+    islemler = [["Tarih", "Tur", "Islem", "Sembol", "Adet", "Fiyat", "Komisyon", "Toplam"]] + [
+        list(r) for r in zip(tarih, turler[sec], islem, semboller[sec], adet.astype(str),
+                             _virgullu(fiyat), itertools.repeat("0"), _virgullu(toplam))
+    ]
+
+    nakit_sayisi = max(1, islem_sayisi // 10)
+    nakit = [["Tarih", "Aciklama", "Tutar", "Tip"]] + [
+        list(r) for r in zip(gunler[np.sort(rng.integers(0, gun_sayisi, nakit_sayisi))],
+                             itertools.repeat("sentetik"),
+                             _virgullu(np.round(rng.uniform(100, 50000, nakit_sayisi), 2)),
+                             np.where(rng.random(nakit_sayisi) < 0.7, "Giriş", "Çıkış"))
+    ]
+
+    fiyatlar = [["Fon Kodu", "Fiyat", "Günlük %", datetime.now().strftime("%Y-%m-%d %H:%M:%S")]] + [
+        [f, *_virgullu([round(rng.uniform(1, 50), 6), round(rng.normal(0, 1), 2)])] for f in fonlar
+    ]
+
+    degerler = np.round(rng.uniform(1e5, 1e7, (gun_sayisi, 5)), 2)
+    gecmis = [["Tarih", "ToplamVarlik", "ToplamMaliyet", "DolarKuru", "NetAnaPara", "Nakit"]] + [
+        [g, *_virgullu(r)] for g, r in zip(gunler, degerler)
+    ]
+
+    kz = np.round(rng.normal(0, 30, (gun_sayisi, len(semboller))), 2)
+    varlik = [["Tarih", *semboller.tolist()]] + [[g, *_virgullu(r)] for g, r in zip(gunler, kz)]
+
+    return {"Islemler": islemler, "Nakit": nakit, "Fiyatlar": fiyatlar, "Gecmis": gecmis, "VarlikKari": varlik}
+
+
+def olc(fonk, tekrar):
+    sureler = []
+    for _ in range(tekrar):
+        baslangic = time.perf_counter()
+        sonuc = fonk()
+        sureler.append(time.perf_counter() - baslangic)
+    return sonuc, {"min": min(sureler), "medyan": float(np.median(sureler))}
+
+
+def kosu(islem_sayisi, sembol_sayisi, tekrar=3):
+    veri = sentetik_veri(islem_sayisi, sembol_sayisi)
+    sureler = {}
+    with tempfile.TemporaryDirectory(ignore_cleanup_errors=True) as klasor:
+        depo = LocalStorage(os.path.join(klasor, "benchmark.sqlite"))
+        for sayfa, satirlar in veri.items():
+            mirror.yerel_yaz(depo.yol, sayfa, satirlar)
+
+        ham, sureler["okuma"] = olc(depo.oku, tekrar)
+        # Ayrıştırma app.py okuyucularının çağırdığı sayfalar fonksiyonlarıyla ölçülür
+        (df, _), sureler["islem_ayristirma"] = olc(lambda: sayfalar.islemler(ham["Islemler"]), tekrar)
+        _, sureler["varlik_ayristirma"] = olc(lambda: sayfalar.varlik_kari(ham["VarlikKari"]), tekrar)
+        (portfolio, giren, cikan), sureler["ledger"] = olc(lambda: calculate_portfolio_unified(df), tekrar)
+
+        hisse_fiyatlari = {
+            sym: (p, p * 0.99) for sym, p in zip(df["Sembol"], df["Fiyat"]) if sym.startswith("H")
+        }
+        fund_data = sayfalar.fon_fiyatlari(ham["Fiyatlar"])
+        (liste, _), sureler["degerleme"] = olc(
+            lambda: valuation.portfoy_degerle(portfolio, hisse_fiyatlari, fund_data, 60.0), tekrar
+        )
+
+        toplam_deger = sum(x["Değer (TL)"] for x in liste)
+        toplam_maliyet = sum(x["Ort. Maliyet"] * x["Lot"] for x in liste)
+        _, sureler["gunluk_kayit"] = olc(
+            lambda: snapshots.save_daily_snapshot(depo, toplam_deger, toplam_maliyet, 1.0, giren - cikan, 0.0),
+            tekrar,
+        )
+        _, sureler["varlik_kayit"] = olc(lambda: snapshots.save_asset_snapshots(depo, liste), tekrar)
+
+        nakit, _ = sayfalar.nakit(ham["Nakit"])
+        guncel = {sym: v["fiyat"] for sym, v in fund_data.items()}
+        _, sureler["geri_doldurma"] = olc(lambda: yeniden_olustur(df, None, guncel, nakit), tekrar)
+        indeks, sureler["zaman_indeksi"] = olc(lambda: ZamanIndeksi(df, nakit), tekrar)
+        orta = df["Tarih"].quantile(0.5)
+        _, sureler["tarih_sorgusu"] = olc(lambda: indeks.durum(orta), tekrar)
+    return sureler
+
+
+def surum():
+    # Ölçülen kodun git sürümü; commit edilmemiş değişiklik varsa sonuna + eklenir
+    try:
+        kok = os.path.dirname(os.path.abspath(__file__))
+        hash_ = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=kok,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        kirli = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=kok,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return hash_ + ("+" if kirli else "")
+    except Exception:
+        return "bilinmiyor"
+
+
+def onceki_sonuclar(yol):
+    if not os.path.exists(yol):
+        return []
+    with open(yol, encoding="utf-8") as f:
+        return [json.loads(satir) for satir in f if satir.strip()]
+
+
+def karsilastir(kayit, onceki):
+    # Aynı ölçekteki son kayıtla aşama aşama oran
+    eslesen = [k for k in onceki if k["islem"] == kayit["islem"] and k["sembol"] == kayit["sembol"]]
+    if not eslesen:
+        return {}
+    referans = eslesen[-1]
+    return {
+        asama: (referans["surum"], s["medyan"] / referans["sureler"][asama]["medyan"])
+        for asama, s in kayit["sureler"].items()
+        if asama in referans["sureler"] and referans["sureler"][asama]["medyan"] > 0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentetik veriyle sıcak yolların süre ölçümü")
+    parser.add_argument("--islem", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--sembol", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--tekrar", type=int, default=3)
+    parser.add_argument("--cikti", default=SONUC_DOSYASI)
+    parser.add_argument("--kaydetme", action="store_true", help="Sonuçları dosyaya ekleme")
+    args = parser.parse_args()
+
+    onceki = onceki_sonuclar(args.cikti)
+    gerileme = False
+    for islem_sayisi, sembol_sayisi in itertools.product(args.islem, args.sembol):
+        kayit = {
+            "zaman": datetime.now().isoformat(timespec="seconds"),
+            "surum": surum(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "numpy": np.__version__,
+            "islem": islem_sayisi,
+            "sembol": sembol_sayisi,
+            "tekrar": args.tekrar,
+            "sureler": kosu(islem_sayisi, sembol_sayisi, args.tekrar),
+        }
+        oranlar = karsilastir(kayit, onceki)
+        print(f"\n{islem_sayisi:,} işlem · {sembol_sayisi:,} sembol · sürüm {kayit['surum']}")
+        for asama, s in kayit["sureler"].items():
+            satir = f"  {asama:<18} medyan {s['medyan'] * 1000:10.1f} ms   min {s['min'] * 1000:10.1f} ms"
+            if asama in oranlar:
+                ref_surum, oran = oranlar[asama]
+                isaret = "  ⚠️ gerileme" if oran > GERILEME_ESIGI else ""
+                gerileme = gerileme or oran > GERILEME_ESIGI
+                satir += f"   {oran:5.2f}x ({ref_surum}){isaret}"
+            print(satir)
+        if not args.kaydetme:
+            with open(args.cikti, "a", encoding="utf-8") as f:
+                f.write(json.dumps(kayit, ensure_ascii=False) + "\n")
+        onceki.append(kayit)
+    return 1 if gerileme else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,357 @@
+import hashlib
+import os
+import pickle
+import threading
+import numpy as np
+import pandas as pd
+
+import profiler
+
+TOZ_ESIGI = 0.001
+LEDGER_KOLONLARI = ["Tarih", "Tur", "Islem", "Sembol", "Adet", "Toplam"]
+# Lot biçimi değişince eski checkpoint dosyaları okunmaz
+CHECKPOINT_SURUMU = 2
+GUN_NS = 86_400_000_000_000
+# Lot yaşı dağılımının gün sınırları
+YAS_SINIRLARI = (30, 90, 365)
+# Tarih sorgusu için her bu kadar işlemde bir portföy kopyası tutulur
+KONTROL_ARALIGI = 500
+NAT_NS = np.iinfo(np.int64).min
+
+_checkpoint_kilit = threading.Lock()
+_checkpoint = {}
+
+
+def normalize_islem(islem):
+    s = str(islem).strip().upper()
+    s = s.replace("İ", "I").replace("Ş", "S").replace("Ç", "C")
+    s = s.replace("Ğ", "G").replace("Ü", "U").replace("Ö", "O")
+    if s.startswith("AL"):
+        return "ALIS"
+    if s.startswith("SAT"):
+        return "SATIS"
+    return s
+
+
+def normalize_islem_kolon(seri):
+    # Her benzersiz değer için bir kez normalize edilir, sonra kodlarla yayılır
+    kodlar, benzersiz = pd.factorize(seri, use_na_sentinel=False)
+    normal = np.array([normalize_islem(x) for x in benzersiz], dtype=object)
+    return normal[kodlar] if len(normal) else np.array([], dtype=object)
+
+
+class LotDefteri:
+    # Alış lotları paralel dizilerde tutulur (adet, tarih ns); FIFO satış baştaki lotları
+    # tüketip baş göstergesini ilerletir, dizi kaydırılmaz ve lot başına dict oluşmaz
+    __slots__ = ("adet", "tarih", "bas", "son")
+
+    def __init__(self, kapasite=8):
+        self.adet = np.empty(kapasite, dtype=float)
+        self.tarih = np.empty(kapasite, dtype=np.int64)
+        self.bas = 0
+        self.son = 0
+
+    def __len__(self):
+        return self.son - self.bas
+
+    def _yer_ac(self):
+        # Tüketilmiş baş kısım atılır, kalan lotlar için kapasite ikiye katlanır
+        n = len(self)
+        adet = np.empty(max(8, 2 * n), dtype=float)
+        tarih = np.empty(len(adet), dtype=np.int64)
+        adet[:n] = self.adet[self.bas:self.son]
+        tarih[:n] = self.tarih[self.bas:self.son]
+        self.adet, self.tarih, self.bas, self.son = adet, tarih, 0, n
+
+    def ekle(self, adet, tarih_ns):
+        if self.son == len(self.adet):
+            self._yer_ac()
+        self.adet[self.son] = adet
+        self.tarih[self.son] = tarih_ns
+        self.son += 1
+
+    def tuket(self, miktar):
+        # Eski döngüyle aynı sırada çıkarılır; kayan nokta sonucu korunur
+        adet = self.adet
+        while miktar > 0 and self.bas < self.son:
+            ilk = adet[self.bas]
+            if ilk <= miktar:
+                miktar -= ilk
+                self.bas += 1
+            else:
+                adet[self.bas] = ilk - miktar
+                miktar = 0
+
+    def sifirla(self):
+        self.bas = self.son = 0
+
+    def kalan_adetler(self):
+        return self.adet[self.bas:self.son]
+
+    def gunler(self, bugun):
+        # Her lotun elde tutulma günü; en az 1, tarihi olmayan lot 1 gün sayılır
+        tarih = self.tarih[self.bas:self.son]
+        gun = (np.datetime64(bugun, "ns").astype(np.int64) - tarih) // GUN_NS
+        return np.where(tarih == np.iinfo(np.int64).min, 1, np.maximum(1, gun))
+
+    def agirlikli_gun(self, bugun):
+        return float(np.dot(self.gunler(bugun), self.kalan_adetler())) if len(self) else 0.0
+
+    def ortalama_gun(self, bugun, net):
+        return int(self.agirlikli_gun(bugun) / net) if net > 0 else 0
+
+    def yas_kovalari(self, bugun, sinirlar=YAS_SINIRLARI):
+        # Kalan adetlerin yaş aralıklarına dağılımı: [<s0, s0-s1, ..., >=sN] gün
+        kova = np.searchsorted(np.asarray(sinirlar), self.gunler(bugun), side="right")
+        return np.bincount(kova, weights=self.kalan_adetler(), minlength=len(sinirlar) + 1)
+
+    def kopya(self):
+        yeni = LotDefteri(max(8, len(self)))
+        n = len(self)
+        yeni.adet[:n] = self.kalan_adetler()
+        yeni.tarih[:n] = self.tarih[self.bas:self.son]
+        yeni.son = n
+        return yeni
+
+
+def yas_kovasi_adlari(sinirlar=YAS_SINIRLARI):
+    return ([f"<{sinirlar[0]} gün"] + [f"{a}-{b} gün" for a, b in zip(sinirlar, sinirlar[1:])]
+            + [f"≥{sinirlar[-1]} gün"])
+
+
+def yeni_pozisyon(tur):
+    return {"Adet": 0, "Maliyet": 0, "NetGiris": 0.0, "Tur": tur, "Alimlar": LotDefteri()}
+
+
+def pozisyon_sifirla(poz):
+    poz["Adet"] = 0
+    poz["Maliyet"] = 0
+    poz["NetGiris"] = 0
+    poz["Alimlar"].sifirla()
+
+
+def pozisyona_uygula(poz, islemler, adetler, toplamlar, tarihler, durumlar=None):
+    # Satırlar tarih sırasında gelmeli; aritmetik eski iterrows döngüsüyle birebir aynıdır.
+    # durumlar verilirse her satırdan sonraki (Adet, Maliyet) eklenir
+    alimlar = poz["Alimlar"]
+    for islem, qty, total, tarih in zip(islemler, adetler, toplamlar, tarihler):
+        if islem == "ALIS":
+            poz["Adet"] += qty
+            poz["Maliyet"] += total
+            poz["NetGiris"] += total
+            alimlar.ekle(qty, tarih)
+        elif islem == "SATIS":
+            if poz["Adet"] > 0:
+                avg_cost = poz["Maliyet"] / poz["Adet"]
+                poz["Maliyet"] -= (qty * avg_cost)
+                poz["Adet"] -= qty
+                poz["NetGiris"] -= total
+                alimlar.tuket(qty)
+            else:
+                pozisyon_sifirla(poz)
+
+        if poz["Adet"] <= TOZ_ESIGI:
+            pozisyon_sifirla(poz)
+
+        if poz["NetGiris"] < 0:
+            poz["NetGiris"] = 0
+        if durumlar is not None:
+            durumlar.append((poz["Adet"], poz["Maliyet"]))
+    return poz
+
+
+def ledger_dizileri(df):
+    df = df.sort_values("Tarih", kind="mergesort")
+    return {
+        "Sembol": df["Sembol"].to_numpy(dtype=object),
+        "Tur": df["Tur"].to_numpy(dtype=object),
+        "Islem": normalize_islem_kolon(df["Islem"]),
+        "Adet": df["Adet"].to_numpy(dtype=float),
+        "Toplam": df["Toplam"].to_numpy(dtype=float),
+        # Lot tarihleri int64 nanosaniye; NaT en küçük int64 olur
+        "Tarih": df["Tarih"].to_numpy(dtype="datetime64[ns]").view(np.int64),
+    }
+
+
+def ledger_uygula(portfolio, d, durumlar=None):
+    # Sembol bazında grupla; her sembolün satırları kendi sırasıyla tek geçişte işlenir.
+    # durumlar (n x 2 dizi) verilirse her satırdan sonraki sembol durumu yerine yazılır
+    if len(d["Sembol"]) == 0:
+        return portfolio
+    kodlar, semboller = pd.factorize(d["Sembol"], use_na_sentinel=False)
+    sira = np.argsort(kodlar, kind="stable")
+    sinirlar = np.cumsum(np.bincount(kodlar, minlength=len(semboller)))[:-1]
+    for kod, idx in enumerate(np.split(sira, sinirlar)):
+        sym = semboller[kod]
+        if sym not in portfolio:
+            portfolio[sym] = yeni_pozisyon(d["Tur"][idx[0]])
+        kayit = [] if durumlar is not None else None
+        pozisyona_uygula(
+            portfolio[sym],
+            d["Islem"][idx].tolist(), d["Adet"][idx].tolist(),
+            d["Toplam"][idx].tolist(), d["Tarih"][idx].tolist(), kayit,
+        )
+        if kayit:
+            durumlar[idx] = kayit
+    return portfolio
+
+
+def ledger_durumlari(df):
+    # Tarih sırasındaki her satırdan sonra o sembolün (Adet, Maliyet) durumu
+    d = ledger_dizileri(df)
+    durumlar = np.zeros((len(d["Sembol"]), 2))
+    ledger_uygula({}, d, durumlar)
+    return d, durumlar
+
+
+def ledger_toplamlari(d, giren=0, cikan=0):
+    # Python sum sıralı toplar; eski döngünün kayan nokta sonucu korunur
+    toplam_giren = sum(d["Toplam"][d["Islem"] == "ALIS"].tolist(), giren)
+    toplam_cikan = sum(d["Toplam"][d["Islem"] == "SATIS"].tolist(), cikan)
+    return toplam_giren, toplam_cikan
+
+
+def portfoy_disari(portfolio):
+    return {
+        sym: {**poz, "Alimlar": poz["Alimlar"].kopya()}
+        for sym, poz in portfolio.items()
+    }
+
+
+def _dilim(d, bas, son):
+    return {k: v[bas:son] for k, v in d.items()}
+
+
+class ZamanIndeksi:
+    # Tarih sıralı Islemler'in her KONTROL_ARALIGI satırında portföy kopyası, Islemler ve
+    # Nakit tarih dizileri. D günündeki durum: ikili arama + en yakın önceki kopyadan
+    # en fazla KONTROL_ARALIGI satırın oynatılması
+
+    @profiler.olculen("zaman_indeksi")
+    def __init__(self, df, nakit=None, aralik=KONTROL_ARALIGI):
+        self.aralik = aralik
+        if df.empty or "Tarih" not in df.columns:
+            df = pd.DataFrame({k: pd.Series(dtype="datetime64[ns]" if k == "Tarih" else object)
+                               for k in LEDGER_KOLONLARI})
+        d = ledger_dizileri(df)
+        # sort_values NaT'leri sona koyar; tarihsiz satırlar hiçbir güne dahil edilmez
+        tarihli = int((d["Tarih"] != NAT_NS).sum())
+        self.d = _dilim(d, 0, tarihli)
+        portfolio, giren, cikan = {}, 0, 0
+        self.noktalar = [({}, giren, cikan)]
+        for bas in range(0, tarihli - tarihli % aralik, aralik):
+            parca = _dilim(self.d, bas, bas + aralik)
+            ledger_uygula(portfolio, parca)
+            giren, cikan = ledger_toplamlari(parca, giren, cikan)
+            self.noktalar.append((portfoy_disari(portfolio), giren, cikan))
+
+        self.nakit_tarih = np.array([], dtype=np.int64)
+        self.nakit_bakiye = np.array([], dtype=float)
+        if nakit is not None and not nakit.empty:
+            n = nakit.dropna(subset=["Tarih"]).sort_values("Tarih", kind="mergesort")
+            isaret = np.where(n["Tip"] == "Giriş", 1.0, np.where(n["Tip"] == "Çıkış", -1.0, 0.0))
+            self.nakit_tarih = n["Tarih"].to_numpy(dtype="datetime64[ns]").view(np.int64)
+            self.nakit_bakiye = np.cumsum(isaret * n["Tutar"].to_numpy(dtype=float))
+
+    @profiler.olculen("zaman_indeksi_sorgu")
+    def durum(self, tarih):
+        # tarih gününün sonundaki (portfolio, toplam_giren, toplam_cikan, nakit_bakiye)
+        sinir = (pd.Timestamp(tarih).normalize() + pd.Timedelta(days=1)).value
+        k = int(np.searchsorted(self.d["Tarih"], sinir, side="left"))
+        j = min(k // self.aralik, len(self.noktalar) - 1)
+        nokta, giren, cikan = self.noktalar[j]
+        portfolio = portfoy_disari(nokta)
+        parca = _dilim(self.d, j * self.aralik, k)
+        ledger_uygula(portfolio, parca)
+        giren, cikan = ledger_toplamlari(parca, giren, cikan)
+        m = int(np.searchsorted(self.nakit_tarih, sinir, side="left"))
+        nakit = float(self.nakit_bakiye[m - 1]) if m else 0.0
+        return portfolio, giren, cikan, nakit
+
+
+@profiler.olculen("calculate_portfolio_unified")
+def calculate_portfolio_unified(df):
+    if df.empty or "Tarih" not in df.columns:
+        return {}, 0, 0
+    d = ledger_dizileri(df)
+    portfolio = ledger_uygula({}, d)
+    toplam_giren, toplam_cikan = ledger_toplamlari(d)
+    return portfoy_disari(portfolio), toplam_giren, toplam_cikan
+
+
+def satir_ozetleri(df):
+    return pd.util.hash_pandas_object(df[LEDGER_KOLONLARI], index=False).to_numpy()
+
+
+def onek_ozeti(ozetler, n):
+    return hashlib.sha1(ozetler[:n].tobytes()).hexdigest()
+
+
+def checkpoint_olustur(df, ozetler):
+    d = ledger_dizileri(df)
+    giren, cikan = ledger_toplamlari(d)
+    return {
+        "surum": CHECKPOINT_SURUMU, "n": len(df), "ozet": onek_ozeti(ozetler, len(df)),
+        "portfolio": ledger_uygula({}, d), "giren": giren, "cikan": cikan,
+        "son_tarih": df["Tarih"].max(), "nat_var": bool(df["Tarih"].isna().any()),
+    }
+
+
+def checkpoint_ilerlet(cp, df, ozetler):
+    # Sadece sona eklenen ve tarih sırasını bozmayan satırlar üstüne oynatılabilir;
+    # aksi halde sıralı tam oynatmayla aynı sonucu vermez
+    yeni = df.iloc[cp["n"]:]
+    if cp["nat_var"] or yeni["Tarih"].min() < cp["son_tarih"]:
+        return None
+    d = ledger_dizileri(yeni)
+    ledger_uygula(cp["portfolio"], d)
+    cp["giren"], cp["cikan"] = ledger_toplamlari(d, cp["giren"], cp["cikan"])
+    cp["n"] = len(df)
+    cp["ozet"] = onek_ozeti(ozetler, len(df))
+    if yeni["Tarih"].notna().any():
+        cp["son_tarih"] = yeni["Tarih"].max()
+    cp["nat_var"] = bool(yeni["Tarih"].isna().any())
+    return cp
+
+
+def checkpoint_oku(yol):
+    try:
+        with open(yol, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return None
+
+
+def checkpoint_yaz(yol, cp):
+    try:
+        gecici = f"{yol}.tmp"
+        with open(gecici, "wb") as f:
+            pickle.dump(cp, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(gecici, yol)
+    except Exception as e:
+        print(f"[Ledger] checkpoint yazılamadı: {e}")
+
+
+@profiler.olculen("calculate_portfolio_incremental")
+def calculate_portfolio_incremental(df, yol=None):
+    if df.empty or "Tarih" not in df.columns:
+        return {}, 0, 0
+    with _checkpoint_kilit:
+        cp = _checkpoint.get(yol)
+        if cp is None and yol:
+            cp = checkpoint_oku(yol)
+        ozetler = satir_ozetleri(df)
+        degisti = False
+        if cp is not None and (cp.get("surum") != CHECKPOINT_SURUMU or cp["n"] > len(df)
+                               or onek_ozeti(ozetler, cp["n"]) != cp["ozet"]):
+            cp = None
+        if cp is not None and cp["n"] < len(df):
+            cp = checkpoint_ilerlet(cp, df, ozetler)
+            degisti = True
+        if cp is None:
+            cp = checkpoint_olustur(df, ozetler)
+            degisti = True
+        _checkpoint[yol] = cp
+        if degisti and yol:
+            checkpoint_yaz(yol, cp)
+        return portfoy_disari(cp["portfolio"]), cp["giren"], cp["cikan"]
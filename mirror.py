@@ -0,0 +1,361 @@
+import json
+import sqlite3
+import threading
+import time
+
+import gspread
+from gspread.utils import a1_to_rowcol, fill_gaps
+
+SAYFALAR = ["Islemler", "Nakit", "Fiyatlar", "Gecmis", "VarlikKari"]
+# Bu sayfalara sadece satır eklenir; ara satırların silinmesi A sütunundan anlaşılır
+EKLEMELI_SAYFALAR = {"Islemler", "Nakit"}
+# Eklemeli sayfaların son bu kadar satırı her değişiklikte tüm sütunlarıyla okunur; yakın
+# zamanda düzeltilen Adet/Tutar hücreleri böyle yakalanır
+SON_SATIR_KONTROLU = 50
+# Bu sayfalarda bugünün satırı yerinde güncellenir, son satır her senkronda tekrar okunur
+SON_SATIRI_DEGISEN = {"Gecmis", "VarlikKari"}
+SENKRON_ARALIGI = 30.0
+# Daha eski satırlardaki yerinde düzeltmeler, sayfa değiştiyse bu aralıkla yapılan tam okumada yakalanır
+TAM_SENKRON_ARALIGI = 600.0
+
+_kilit = threading.RLock()
+_baglantilar = {}
+_son_senkron = {}
+_son_tam = {}
+_drive_uyarisi = set()
+_zorla = {}
+# Süreç içi sayfa sürümleri; yerel kopyada içerik her değiştiğinde artar
+_surumler = {}
+
+
+def baglanti(yol):
+    with _kilit:
+        conn = _baglantilar.get(yol)
+        if conn is None:
+            conn = sqlite3.connect(yol, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS satirlar ("
+                "sayfa TEXT NOT NULL, satir_no INTEGER NOT NULL, degerler TEXT NOT NULL, "
+                "PRIMARY KEY (sayfa, satir_no))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sayfalar ("
+                "sayfa TEXT PRIMARY KEY, mevcut INTEGER NOT NULL, damga TEXT, zaman REAL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (anahtar TEXT PRIMARY KEY, deger TEXT)")
+            _baglantilar[yol] = conn
+        return conn
+
+
+def surum(yol, sayfa):
+    with _kilit:
+        return _surumler.get((yol, sayfa), 0)
+
+
+def _surum_artir(yol, sayfa):
+    with _kilit:
+        _surumler[(yol, sayfa)] = _surumler.get((yol, sayfa), 0) + 1
+
+
+def hucre(v):
+    # Sheets'in gösterdiği biçime yakın yazılır ki safe_float/safe_adet aynı sonucu versin
+    if isinstance(v, float):
+        return str(int(v)) if v.is_integer() else str(v).replace(".", ",")
+    return str(v)
+
+
+def yerel_mevcut(yol, sayfa):
+    with _kilit:
+        meta = baglanti(yol).execute("SELECT mevcut FROM sayfalar WHERE sayfa = ?", (sayfa,)).fetchone()
+    return bool(meta and meta[0])
+
+
+def yerel_oku(yol, sayfa):
+    with _kilit:
+        if not yerel_mevcut(yol, sayfa):
+            return None
+        satirlar = baglanti(yol).execute(
+            "SELECT degerler FROM satirlar WHERE sayfa = ? ORDER BY satir_no", (sayfa,)
+        ).fetchall()
+    return fill_gaps([json.loads(s[0]) for s in satirlar]) if satirlar else []
+
+
+def yerel_satir_sayisi(yol, sayfa):
+    with _kilit:
+        r = baglanti(yol).execute(
+            "SELECT COALESCE(MAX(satir_no), 0) FROM satirlar WHERE sayfa = ?", (sayfa,)
+        ).fetchone()
+    return r[0]
+
+
+def yerel_a_sutunu(yol, sayfa):
+    with _kilit:
+        satirlar = baglanti(yol).execute(
+            "SELECT degerler FROM satirlar WHERE sayfa = ? ORDER BY satir_no", (sayfa,)
+        ).fetchall()
+    return [(json.loads(s[0]) or [""])[0] for s in satirlar]
+
+
+def yerel_yaz(yol, sayfa, satirlar, baslangic=1, damga=None):
+    # baslangic satırından itibaren sayfanın yerel kopyasını verilen satırlarla değiştirir;
+    # içerik aynıysa satırlara dokunulmaz ve sürüm artmaz
+    yeni = [(baslangic + i, json.dumps([hucre(v) for v in r], ensure_ascii=False))
+            for i, r in enumerate(satirlar)]
+    with _kilit:
+        conn = baglanti(yol)
+        degisti = not yerel_mevcut(yol, sayfa) or conn.execute(
+            "SELECT satir_no, degerler FROM satirlar WHERE sayfa = ? AND satir_no >= ? ORDER BY satir_no",
+            (sayfa, baslangic),
+        ).fetchall() != yeni
+        conn.execute("BEGIN")
+        try:
+            if degisti:
+                conn.execute("DELETE FROM satirlar WHERE sayfa = ? AND satir_no >= ?", (sayfa, baslangic))
+                conn.executemany(
+                    "INSERT INTO satirlar (sayfa, satir_no, degerler) VALUES (?, ?, ?)",
+                    [(sayfa, no, degerler) for no, degerler in yeni],
+                )
+            conn.execute(
+                "INSERT INTO sayfalar (sayfa, mevcut, damga, zaman) VALUES (?, 1, ?, ?) "
+                "ON CONFLICT(sayfa) DO UPDATE SET mevcut = 1, "
+                "damga = COALESCE(excluded.damga, sayfalar.damga), zaman = excluded.zaman",
+                (sayfa, damga, time.time()),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if degisti:
+            _surum_artir(yol, sayfa)
+
+
+def yerel_ekle(yol, sayfa, satir):
+    with _kilit:
+        yerel_yaz(yol, sayfa, [satir], baslangic=yerel_satir_sayisi(yol, sayfa) + 1)
+
+
+def yerel_ekle_toplu(yol, eklemeler):
+    # {sayfa: satırlar}; tüm sayfalara eklenen satırlar tek SQLite işleminde yazılır
+    eklemeler = {sayfa: satirlar for sayfa, satirlar in eklemeler.items() if satirlar}
+    with _kilit:
+        conn = baglanti(yol)
+        conn.execute("BEGIN")
+        try:
+            for sayfa, satirlar in eklemeler.items():
+                baslangic = yerel_satir_sayisi(yol, sayfa) + 1
+                conn.executemany(
+                    "INSERT INTO satirlar (sayfa, satir_no, degerler) VALUES (?, ?, ?)",
+                    [(sayfa, baslangic + i, json.dumps([hucre(v) for v in r], ensure_ascii=False))
+                     for i, r in enumerate(satirlar)],
+                )
+                conn.execute(
+                    "INSERT INTO sayfalar (sayfa, mevcut, damga, zaman) VALUES (?, 1, NULL, ?) "
+                    "ON CONFLICT(sayfa) DO UPDATE SET mevcut = 1, zaman = excluded.zaman",
+                    (sayfa, time.time()),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        for sayfa in eklemeler:
+            _surum_artir(yol, sayfa)
+
+
+def yerel_guncelle(yol, sayfa, aralik, degerler):
+    # A1 aralığının sol üst hücresinden başlayarak değerleri yerel satırlara yazar
+    satir0, sutun0 = a1_to_rowcol(aralik.split("!")[-1].split(":")[0])
+    with _kilit:
+        conn = baglanti(yol)
+        conn.execute("BEGIN")
+        try:
+            son = conn.execute(
+                "SELECT COALESCE(MAX(satir_no), 0) FROM satirlar WHERE sayfa = ?", (sayfa,)
+            ).fetchone()[0]
+            conn.executemany(
+                "INSERT INTO satirlar (sayfa, satir_no, degerler) VALUES (?, ?, '[]')",
+                [(sayfa, no) for no in range(son + 1, satir0)],
+            )
+            for i, yeni in enumerate(degerler):
+                r = conn.execute(
+                    "SELECT degerler FROM satirlar WHERE sayfa = ? AND satir_no = ?", (sayfa, satir0 + i)
+                ).fetchone()
+                satir = json.loads(r[0]) if r else []
+                satir += [""] * (sutun0 - 1 + len(yeni) - len(satir))
+                satir[sutun0 - 1:sutun0 - 1 + len(yeni)] = [hucre(v) for v in yeni]
+                conn.execute(
+                    "INSERT OR REPLACE INTO satirlar (sayfa, satir_no, degerler) VALUES (?, ?, ?)",
+                    (sayfa, satir0 + i, json.dumps(satir, ensure_ascii=False)),
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        _surum_artir(yol, sayfa)
+
+
+def yerel_sil(yol, sayfa, satir_no):
+    # Sheets'teki delete_rows gibi alttaki satırlar bir yukarı kayar
+    with _kilit:
+        conn = baglanti(yol)
+        conn.execute("BEGIN")
+        try:
+            conn.execute("DELETE FROM satirlar WHERE sayfa = ? AND satir_no = ?", (sayfa, satir_no))
+            conn.execute(
+                "UPDATE satirlar SET satir_no = -(satir_no - 1) WHERE sayfa = ? AND satir_no > ?",
+                (sayfa, satir_no),
+            )
+            conn.execute("UPDATE satirlar SET satir_no = -satir_no WHERE sayfa = ? AND satir_no < 0", (sayfa,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        _surum_artir(yol, sayfa)
+
+
+def _yok_isaretle(yol, sayfa):
+    with _kilit:
+        if not yerel_mevcut(yol, sayfa):
+            return
+        _surum_artir(yol, sayfa)
+        conn = baglanti(yol)
+        conn.execute("DELETE FROM satirlar WHERE sayfa = ?", (sayfa,))
+        conn.execute(
+            "INSERT INTO sayfalar (sayfa, mevcut, damga, zaman) VALUES (?, 0, NULL, ?) "
+            "ON CONFLICT(sayfa) DO UPDATE SET mevcut = 0, damga = NULL, zaman = excluded.zaman",
+            (sayfa, time.time()),
+        )
+
+
+def _meta(yol, anahtar):
+    with _kilit:
+        r = baglanti(yol).execute("SELECT deger FROM meta WHERE anahtar = ?", (anahtar,)).fetchone()
+    return r[0] if r else None
+
+
+def _meta_yaz(yol, anahtar, deger):
+    with _kilit:
+        baglanti(yol).execute("INSERT OR REPLACE INTO meta (anahtar, deger) VALUES (?, ?)", (anahtar, deger))
+
+
+def isaretle(yol, tam=False):
+    # Bir sonraki senkronu süre dolmadan zorlar; tam=True tüm sayfaları baştan çeker
+    with _kilit:
+        _zorla[yol] = "tam" if tam or _zorla.get(yol) == "tam" else "delta"
+
+
+def _batch_get(spreadsheet, araliklar):
+    if not araliklar:
+        return []
+    return spreadsheet.values_batch_get(araliklar).get("valueRanges", [])
+
+
+def _sayfalari_oku(yol, spreadsheet, sayfalar, araliklar):
+    # Olmayan bir sayfa yüzünden istek düşerse sayfa listesi alınıp kalanlar tekrar istenir
+    mevcut = list(sayfalar)
+    try:
+        yanitlar = _batch_get(spreadsheet, araliklar(mevcut))
+    except gspread.exceptions.APIError:
+        basliklar = {ws.title for ws in spreadsheet.worksheets()}
+        mevcut = [ad for ad in sayfalar if ad in basliklar]
+        yanitlar = _batch_get(spreadsheet, araliklar(mevcut))
+    for ad in sayfalar:
+        if ad not in mevcut:
+            _yok_isaretle(yol, ad)
+    return mevcut, yanitlar
+
+
+def _degisim_zamani(yol, spreadsheet):
+    # Drive'daki son değişiklik zamanı; hücre düzeltmeleri dahil her değişiklikte ilerler
+    try:
+        return spreadsheet.get_lastUpdateTime()
+    except gspread.exceptions.APIError as e:
+        if yol not in _drive_uyarisi:
+            _drive_uyarisi.add(yol)
+            print(f"[Mirror] Drive değişiklik zamanı okunamadı, her senkronda değişiklik kontrol edilecek: {e}")
+        return None
+
+
+def _fiyat_damgasi(satirlar):
+    # Fiyatlar!D1: fon fiyatlarının son güncellenme zamanı
+    return (fill_gaps(satirlar[:1], cols=4) or [[""] * 4])[0][3]
+
+
+def tam_oku(yol, spreadsheet, sayfalar=SAYFALAR):
+    mevcut, yanitlar = _sayfalari_oku(yol, spreadsheet, sayfalar, list)
+    for ad, yanit in zip(mevcut, yanitlar):
+        satirlar = yanit.get("values", [])
+        yerel_yaz(yol, ad, satirlar, damga=_fiyat_damgasi(satirlar) if ad == "Fiyatlar" else None)
+    return {"okunan": mevcut}
+
+
+def senkronize(yol, spreadsheet_ac, sayfalar=SAYFALAR):
+    # Drive değişiklik zamanı aynıysa hiç okuma yapılmaz. Değiştiyse (ya da okunamıyorsa)
+    # 1. istek her sayfanın A sütunu, 2. istek değişen aralıklar, eklemeli sayfaların son
+    # SON_SATIR_KONTROLU satırı ve küçük Fiyatlar sayfası; TAM_SENKRON_ARALIGI'nda bir
+    # tam okuma. Yerel kopyada sadece içeriği farklı çıkan sayfaların sürümü artar
+    with _kilit:
+        zorla = _zorla.pop(yol, None)
+        if not zorla and time.monotonic() - _son_senkron.get(yol, float("-inf")) < SENKRON_ARALIGI:
+            return None
+        _son_senkron[yol] = time.monotonic()
+    spreadsheet = spreadsheet_ac()
+    zaman = _degisim_zamani(yol, spreadsheet)
+    if zorla != "tam":
+        if zaman is not None and zaman == _meta(yol, "degisim_zamani"):
+            return {"okunan": []}
+        if time.monotonic() - _son_tam.get(yol, float("-inf")) >= TAM_SENKRON_ARALIGI:
+            zorla = "tam"
+    if zorla == "tam":
+        sonuc = tam_oku(yol, spreadsheet, sayfalar)
+        with _kilit:
+            _son_tam[yol] = time.monotonic()
+    else:
+        sonuc = _delta_oku(yol, spreadsheet, sayfalar)
+    if zaman is not None:
+        _meta_yaz(yol, "degisim_zamani", zaman)
+    return sonuc
+
+
+def _delta_oku(yol, spreadsheet, sayfalar):
+    mevcut, a_sutunlari = _sayfalari_oku(yol, spreadsheet, sayfalar, lambda m: [f"{ad}!A:A" for ad in m])
+    uzak_a = {ad: [(r or [""])[0] for r in a_sutunlari[i].get("values", [])] for i, ad in enumerate(mevcut)}
+
+    istekler = []
+    for ad in mevcut:
+        uzak = uzak_a[ad]
+        yerel = yerel_a_sutunu(yol, ad) if yerel_mevcut(yol, ad) else None
+        if yerel is None or ad == "Fiyatlar":
+            istekler.append((ad, 1, ad))
+        elif ad in EKLEMELI_SAYFALAR:
+            bas = max(2, len(yerel) - SON_SATIR_KONTROLU + 1)
+            if len(uzak) < len(yerel) or uzak[:len(yerel)] != yerel:
+                istekler.append((ad, 1, ad))
+            elif len(uzak) >= bas:
+                istekler.append((ad, bas, f"{ad}!{bas}:{len(uzak)}"))
+        elif ad in SON_SATIRI_DEGISEN:
+            sabit = max(1, len(yerel) - 1)
+            if len(uzak) < len(yerel) or uzak[:sabit] != yerel[:sabit]:
+                istekler.append((ad, 1, ad))
+            else:
+                istekler.append((ad, 1, f"{ad}!1:1"))
+                if len(uzak) > 1:
+                    istekler.append((ad, sabit + 1, f"{ad}!{sabit + 1}:{len(uzak)}"))
+
+    yanitlar = _batch_get(spreadsheet, [aralik for _, _, aralik in istekler])
+    for (ad, baslangic, aralik), yanit in zip(istekler, yanitlar):
+        satirlar = yanit.get("values", [])
+        if aralik == f"{ad}!1:1":
+            # Sadece başlık: geri kalan satırlara dokunmadan 1. satırı değiştir
+            baslik = json.dumps(satirlar[0] if satirlar else [], ensure_ascii=False)
+            with _kilit:
+                degisti = baglanti(yol).execute(
+                    "UPDATE satirlar SET degerler = ? WHERE sayfa = ? AND satir_no = 1 AND degerler != ?",
+                    (baslik, ad, baslik),
+                ).rowcount
+            if degisti:
+                _surum_artir(yol, ad)
+            continue
+        yerel_yaz(yol, ad, satirlar, baslangic=baslangic,
+                  damga=_fiyat_damgasi(satirlar) if ad == "Fiyatlar" else None)
+    return {"okunan": [aralik for _, _, aralik in istekler]}
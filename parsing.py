@@ -0,0 +1,88 @@
+import numpy as np
+import pandas as pd
+
+
+def _safe_float_ham(val):
+    # safe_float kuralları; okunamayan değer için None döner
+    if val is None or val == "":
+        return 0.0
+    if isinstance(val, (int, float)):
+        return float(val)
+    val_str = str(val).strip()
+    if "." in val_str and "," in val_str:
+        val_str = val_str.replace(".", "")
+    val_str = val_str.replace(",", ".")
+    try:
+        return float(val_str)
+    except (TypeError, ValueError):
+        return None
+
+
+def _safe_adet_ham(val):
+    if val is None or val == "":
+        return 0.0
+    if isinstance(val, (int, float)):
+        return float(val)
+    val_str = str(val).strip().replace("\xa0", "").replace(" ", "")
+    if "," in val_str:
+        val_str = val_str.replace(".", "").replace(",", ".")
+    else:
+        val_str = val_str.replace(".", "")
+    try:
+        return float(val_str)
+    except (TypeError, ValueError):
+        return None
+
+
+def safe_float(val):
+    sonuc = _safe_float_ham(val)
+    return 0.0 if sonuc is None else sonuc
+
+
+def safe_adet(val):
+    sonuc = _safe_adet_ham(val)
+    return 0.0 if sonuc is None else sonuc
+
+
+def _donustur(degerler, ham):
+    # Sheet sütunlarında aynı metin çok tekrar eder ("0", fiyatlar, tarihler);
+    # her benzersiz değer bir kez çözülür, sonuç kodlarla tüm hücrelere yayılır
+    kodlar, benzersiz = pd.factorize(degerler, use_na_sentinel=False)
+    cozulen = list(map(ham, benzersiz))
+    hatali = [i for i, c in enumerate(cozulen) if c is None]
+    for i in hatali:
+        cozulen[i] = 0.0
+    tablo = np.array(cozulen, dtype=float)
+    hatali = [i for i in hatali if str(benzersiz[i]).strip() != ""]
+    okunamayan = int(np.bincount(kodlar, minlength=len(benzersiz))[hatali].sum()) if hatali else 0
+    sonuc = tablo[kodlar]
+    # factorize None ile NaN'ı aynı sayar; kuralları farklı olduğu için ayrı çözülür
+    eksik = pd.isna(degerler)
+    if eksik.any():
+        sonuc[eksik] = [ham(x) for x in degerler[eksik]]
+    return sonuc, okunamayan
+
+
+def safe_float_kolon(seri):
+    # safe_float'ın sütun hali; (float serisi, okunamayan hücre sayısı) döner
+    if pd.api.types.is_numeric_dtype(seri):
+        return seri.astype(float), 0
+    degerler, okunamayan = _donustur(seri.to_numpy(dtype=object), _safe_float_ham)
+    return pd.Series(degerler, index=seri.index, name=seri.name), okunamayan
+
+
+def safe_adet_kolon(seri):
+    if pd.api.types.is_numeric_dtype(seri):
+        return seri.astype(float), 0
+    degerler, okunamayan = _donustur(seri.to_numpy(dtype=object), _safe_adet_ham)
+    return pd.Series(degerler, index=seri.index, name=seri.name), okunamayan
+
+
+def safe_float_cerceve(df, kolonlar):
+    # Geniş sayfalar (VarlikKari) için tüm sütunlar tek seferde çözülür
+    kolonlar = list(kolonlar)
+    if not kolonlar or df.empty:
+        return df[kolonlar].astype(float), 0
+    blok = df[kolonlar].to_numpy(dtype=object)
+    degerler, okunamayan = _donustur(blok.ravel(), _safe_float_ham)
+    return pd.DataFrame(degerler.reshape(blok.shape), index=df.index, columns=kolonlar), okunamayan
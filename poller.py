@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+from datetime import datetime
+from datetime import time as saat
+from zoneinfo import ZoneInfo
+
+import profiler
+import quotes
+
+BIST_SAAT_DILIMI = ZoneInfo("Europe/Istanbul")
+# Açılış öncesi ve kapanış seansı dahil; resmi tatiller hesaba katılmaz
+BIST_ACILIS = saat(9, 40)
+BIST_KAPANIS = saat(18, 10)
+ACIK_ARALIK = float(os.environ.get("PORTFOY_POLL_SECONDS", 60))
+KAPALI_ARALIK = float(os.environ.get("PORTFOY_POLL_CLOSED_SECONDS", 900))
+# Bu süre boyunca hiçbir oturumun istemediği sembol takipten çıkar
+IZLEME_SURESI = 900.0
+# Hiç çekilmemiş sembol için sayfanın ilk turu beklediği en uzun süre
+ILK_BEKLEME = 5.0
+
+_kosul = threading.Condition()
+_izlenen = {}
+_uyandir = threading.Event()
+_thread = None
+durum = {"tur": 0, "son_tur": None, "sure": 0.0, "sembol": 0, "son_hata": None}
+
+
+def bist_acik_mi(an=None):
+    an = an or datetime.now(BIST_SAAT_DILIMI)
+    return an.weekday() < 5 and BIST_ACILIS <= an.time() <= BIST_KAPANIS
+
+
+def _istekler(sadece_yeni):
+    simdi = time.monotonic()
+    with _kosul:
+        for sym in [s for s, t in _izlenen.items() if simdi - t > IZLEME_SURESI]:
+            del _izlenen[sym]
+        semboller = list(_izlenen)
+    istekler = {**quotes.hisse_istekleri(semboller), **quotes.usd_istegi()}
+    if sadece_yeni:
+        istekler = {a: y for a, y in istekler.items() if not quotes.onbellekte_mi(a)}
+    return istekler, len(semboller)
+
+
+@profiler.olculen("piyasa_turu")
+def _tur(sadece_yeni=False):
+    baslangic = time.monotonic()
+    try:
+        istekler, sayi = _istekler(sadece_yeni)
+        quotes.toplu_yenile(istekler)
+    except Exception as e:
+        durum["son_hata"] = str(e)
+        print(f"[Piyasa] tur hata: {e}")
+        return
+    finally:
+        with _kosul:
+            _kosul.notify_all()
+    durum["sembol"] = sayi
+    if not sadece_yeni:
+        durum["tur"] += 1
+        durum["son_tur"] = datetime.now()
+        durum["sure"] = time.monotonic() - baslangic
+
+
+def _calis():
+    sonraki = 0.0
+    while True:
+        bekle = sonraki - time.monotonic()
+        if bekle > 0 and _uyandir.wait(timeout=bekle):
+            # Bir oturum yeni sembol bildirdi; sadece onlar çekilir, takvim değişmez
+            _uyandir.clear()
+            _tur(sadece_yeni=True)
+            continue
+        _uyandir.clear()
+        _tur()
+        sonraki = time.monotonic() + (ACIK_ARALIK if bist_acik_mi() else KAPALI_ARALIK)
+
+
+def baslat():
+    global _thread
+    with _kosul:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_calis, name="piyasa-takipcisi", daemon=True)
+            _thread.start()
+
+
+def izle(symbols):
+    baslat()
+    simdi = time.monotonic()
+    with _kosul:
+        yeni = [s for s in symbols if s not in _izlenen]
+        _izlenen.update(dict.fromkeys(symbols, simdi))
+    if yeni:
+        _uyandir.set()
+    return yeni
+
+
+def _ilk_turu_bekle(anahtarlar):
+    with _kosul:
+        _kosul.wait_for(lambda: all(quotes.onbellekte_mi(a) for a in anahtarlar), timeout=ILK_BEKLEME)
+
+
+def hisse_fiyatlari(symbols):
+    # Sayfa ağa çıkmaz; sadece ortak depodan okur
+    symbols = list(dict.fromkeys(symbols))
+    izle(symbols)
+    anahtarlar = [("hisse", sym) for sym in symbols]
+    _ilk_turu_bekle(anahtarlar)
+    return {sym: deger for (_, sym), deger in quotes.onbellekten_oku(anahtarlar, (0.0, 0.0)).items()}
+
+
+def usd_kuru():
+    _ilk_turu_bekle([quotes.USD_ANAHTARI])
+    return quotes.onbellekten_oku([quotes.USD_ANAHTARI], None)[quotes.USD_ANAHTARI]
@@ -0,0 +1,186 @@
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+import yfinance as yf
+
+import profiler
+
+# Son çekimden bu kadar saniye geçmeden aynı seri için ağa çıkılmaz
+YENILEME_ARALIGI = 3600
+
+_kilit = threading.RLock()
+_baglantilar = {}
+
+
+def baglanti(yol):
+    with _kilit:
+        conn = _baglantilar.get(yol)
+        if conn is None:
+            conn = sqlite3.connect(yol, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kapanislar ("
+                "seri TEXT NOT NULL, tarih TEXT NOT NULL, kapanis REAL NOT NULL, "
+                "PRIMARY KEY (seri, tarih))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS seriler ("
+                "seri TEXT PRIMARY KEY, ilk TEXT, son TEXT, cekim REAL)"
+            )
+            _baglantilar[yol] = conn
+        return conn
+
+
+@profiler.olculen("yfinance_gecmis")
+def _indir_coklu(tickers, baslangic, bitis):
+    # Birden çok seri tek yf.download isteğiyle çekilir
+    profiler.api_cagrisi("yfinance")
+    data = yf.download(list(tickers), start=baslangic, end=bitis, progress=False)
+    if data is None or data.empty:
+        return {}
+    close = data["Close"]
+    if isinstance(close, pd.Series):
+        close = close.to_frame(tickers[0])
+    close.index = pd.to_datetime(close.index).date
+    return {t: close[t].dropna() for t in close.columns if t in tickers}
+
+
+def _indir(ticker, baslangic, bitis):
+    return _indir_coklu([ticker], baslangic, bitis).get(ticker, pd.Series(dtype=float))
+
+
+def _kaydet(yol, ticker, kapanis, cekim):
+    with _kilit:
+        conn = baglanti(yol)
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT OR REPLACE INTO kapanislar (seri, tarih, kapanis) VALUES (?, ?, ?)",
+                [(ticker, d.isoformat(), float(v)) for d, v in kapanis.items()],
+            )
+            ilk, son = conn.execute(
+                "SELECT MIN(tarih), MAX(tarih) FROM kapanislar WHERE seri = ?", (ticker,)
+            ).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO seriler (seri, ilk, son, cekim) VALUES (?, ?, ?, ?)",
+                (ticker, ilk, son, cekim),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def seri_guncelle(yol, ticker, baslangic):
+    # Sadece eksik günler indirilir: istenen başlangıçtan saklı ilk güne kadar olan
+    # baş kısım ve saklı son günden (yarım kalmış olabilir) bugüne kadar olan kuyruk
+    with _kilit:
+        meta = baglanti(yol).execute(
+            "SELECT ilk, son, cekim FROM seriler WHERE seri = ?", (ticker,)
+        ).fetchone()
+    if meta is not None and time.time() - (meta[2] or 0) < YENILEME_ARALIGI:
+        return 0
+    yarin = date.today() + timedelta(days=1)
+    if meta is None or meta[0] is None:
+        parcalar = [_indir(ticker, baslangic, yarin)]
+    else:
+        ilk, son = date.fromisoformat(meta[0]), date.fromisoformat(meta[1])
+        parcalar = [_indir(ticker, son, yarin)]
+        if baslangic < ilk - timedelta(days=7):
+            parcalar.append(_indir(ticker, baslangic, ilk))
+    kapanis = pd.concat(parcalar)
+    _kaydet(yol, ticker, kapanis, time.time())
+    return len(kapanis)
+
+
+def seriler_guncelle(yol, tickers, baslangic):
+    # seri_guncelle'nin toplu hali: hiç verisi olmayan veya başı eksik seriler baslangic'tan,
+    # diğerleri en eski son günden itibaren; en fazla iki istek
+    tickers = list(tickers)
+    with _kilit:
+        metalar = {
+            r[0]: r[1:] for r in baglanti(yol).execute(
+                f"SELECT seri, ilk, son, cekim FROM seriler WHERE seri IN ({','.join('?' * len(tickers))})",
+                tickers,
+            )
+        }
+    simdi = time.time()
+    tam, kuyruk = [], []
+    for t in tickers:
+        meta = metalar.get(t)
+        if meta is not None and simdi - (meta[2] or 0) < YENILEME_ARALIGI:
+            continue
+        if meta is None or meta[0] is None or baslangic < date.fromisoformat(meta[0]) - timedelta(days=7):
+            tam.append(t)
+        else:
+            kuyruk.append(t)
+    yarin = date.today() + timedelta(days=1)
+    gruplar = [(tam, baslangic)]
+    if kuyruk:
+        gruplar.append((kuyruk, min(date.fromisoformat(metalar[t][1]) for t in kuyruk)))
+    for grup, bas in gruplar:
+        if not grup:
+            continue
+        cekilen = _indir_coklu(grup, bas, yarin)
+        zaman = time.time()
+        for t in grup:
+            _kaydet(yol, t, cekilen.get(t, pd.Series(dtype=float)), zaman)
+    return len(tam) + len(kuyruk)
+
+
+def seri_oku(yol, ticker, baslangic=None):
+    with _kilit:
+        satirlar = baglanti(yol).execute(
+            "SELECT tarih, kapanis FROM kapanislar WHERE seri = ? AND tarih >= ? ORDER BY tarih",
+            (ticker, (baslangic or date.min).isoformat()),
+        ).fetchall()
+    return pd.Series(
+        [v for _, v in satirlar], index=[date.fromisoformat(d) for d, _ in satirlar],
+        dtype=float, name=ticker,
+    )
+
+
+def kapanis_serisi(yol, ticker, baslangic):
+    try:
+        seri_guncelle(yol, ticker, baslangic)
+    except Exception as e:
+        print(f"[Fiyat geçmişi] {ticker} güncellenemedi, saklı veri kullanılıyor: {e}")
+    return seri_oku(yol, ticker, baslangic)
+
+
+def kapanis_matrisi(yol, tickers, baslangic):
+    # Tarih x seri kapanış tablosu; indirilemeyen seriler için saklı veri kullanılır
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        return pd.DataFrame()
+    try:
+        seriler_guncelle(yol, tickers, baslangic)
+    except Exception as e:
+        print(f"[Fiyat geçmişi] toplu güncelleme hatası, saklı veri kullanılıyor: {e}")
+    with _kilit:
+        satirlar = baglanti(yol).execute(
+            f"SELECT seri, tarih, kapanis FROM kapanislar WHERE seri IN ({','.join('?' * len(tickers))}) "
+            "AND tarih >= ?",
+            tickers + [baslangic.isoformat()],
+        ).fetchall()
+    uzun = pd.DataFrame(satirlar, columns=["seri", "tarih", "kapanis"])
+    matris = uzun.pivot(index="tarih", columns="seri", values="kapanis")
+    matris.index = pd.to_datetime(matris.index)
+    return matris.reindex(columns=tickers).sort_index()
+
+
+def piyasa_gecmisi(yol, yil=5):
+    baslangic = (datetime.now() - timedelta(days=365 * yil)).date()
+    usd = kapanis_serisi(yol, "USDTRY=X", baslangic)
+    gold = kapanis_serisi(yol, "GC=F", baslangic)
+    if usd.empty or gold.empty:
+        return pd.DataFrame()
+    usd = usd.rename_axis("Date").reset_index(name="USD")
+    gold = gold.rename_axis("Date").reset_index(name="Gold_Ounce")
+    m = pd.merge(usd, gold, on="Date", how="outer").sort_values("Date").ffill()
+    m["Gram_Gold"] = (m["Gold_Ounce"] * m["USD"]) / 31.1035
+    m.set_index("Date", inplace=True)
+    return m
@@ -0,0 +1,105 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# 1 ise her ölçüm stdout'a tek satır JSON olarak da yazılır
+LOG_ACIK = os.environ.get("PORTFOY_PROFIL_LOG", "") not in ("", "0")
+SON_OLCUM_SAYISI = 500
+
+_kilit = threading.Lock()
+_yerel = threading.local()
+_istatistik = {}
+_servisler = {}
+_son_olcumler = deque(maxlen=SON_OLCUM_SAYISI)
+
+
+def _yigin():
+    yigin = getattr(_yerel, "yigin", None)
+    if yigin is None:
+        yigin = _yerel.yigin = []
+    return yigin
+
+
+@contextmanager
+def olc(ad):
+    # Süre ve bu süre içinde aynı thread'de yapılan API çağrıları; iç içe ölçümler
+    # dıştakine de sayılır
+    olcum = {"ad": ad, "cagri": 0, "bayt": 0}
+    yigin = _yigin()
+    yigin.append(olcum)
+    baslangic = time.perf_counter()
+    try:
+        yield olcum
+    finally:
+        sure = time.perf_counter() - baslangic
+        yigin.pop()
+        _bitir(olcum, sure)
+
+
+def _bitir(olcum, sure):
+    olcum.update(sure=sure, bitis=time.time(), thread=threading.get_ident())
+    with _kilit:
+        s = _istatistik.setdefault(
+            olcum["ad"], {"sayi": 0, "toplam": 0.0, "en_uzun": 0.0, "son": 0.0, "cagri": 0, "bayt": 0}
+        )
+        s["sayi"] += 1
+        s["toplam"] += sure
+        s["en_uzun"] = max(s["en_uzun"], sure)
+        s["son"] = sure
+        s["cagri"] += olcum["cagri"]
+        s["bayt"] += olcum["bayt"]
+        _son_olcumler.append(olcum)
+    if LOG_ACIK:
+        print(json.dumps({
+            "olay": "olcum", "ad": olcum["ad"], "sure_ms": round(sure * 1000, 3),
+            "cagri": olcum["cagri"], "bayt": olcum["bayt"],
+            "thread": threading.current_thread().name, "zaman": round(olcum["bitis"], 3),
+        }, ensure_ascii=False), flush=True)
+
+
+def olculen(ad):
+    def sarmala(fonk):
+        @functools.wraps(fonk)
+        def sarilmis(*args, **kwargs):
+            with olc(ad):
+                return fonk(*args, **kwargs)
+        return sarilmis
+    return sarmala
+
+
+def api_cagrisi(servis, bayt=0):
+    for olcum in _yigin():
+        olcum["cagri"] += 1
+        olcum["bayt"] += bayt
+    with _kilit:
+        s = _servisler.setdefault(servis, {"cagri": 0, "bayt": 0})
+        s["cagri"] += 1
+        s["bayt"] += bayt
+
+
+def oturumu_izle(session, servis):
+    # requests oturumunun her yanıtı bir çağrı sayılır; bayt = gönderilen + alınan gövde
+    def kanca(yanit, *args, **kwargs):
+        govde = yanit.request.body or b""
+        if isinstance(govde, str):
+            govde = govde.encode()
+        api_cagrisi(servis, len(govde) + len(yanit.content))
+    session.hooks["response"].append(kanca)
+    return session
+
+
+def istatistikler():
+    with _kilit:
+        return {ad: dict(s) for ad, s in _istatistik.items()}, {ad: dict(s) for ad, s in _servisler.items()}
+
+
+def calisma_olcumleri(baslangic):
+    # Bu thread'de baslangic'tan sonra başlamış ölçümler
+    thread = threading.get_ident()
+    with _kilit:
+        return [dict(o) for o in _son_olcumler
+                if o["thread"] == thread and o["bitis"] - o["sure"] >= baslangic]
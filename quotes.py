@@ -0,0 +1,165 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import partial
+
+import requests
+import yfinance as yf
+from requests.adapters import HTTPAdapter
+
+import profiler
+
+HISSE_WORKERS = 8
+
+FINTABLES_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "application/json",
+}
+FON_TIMEOUT = 8
+FON_WORKERS = 8
+FON_DEADLINE = 12
+
+_kayitlar = {}
+_kayit_kilit = threading.Lock()
+
+
+def yf_sembol(symbol):
+    s = symbol.strip().upper()
+    if not s.endswith(".IS"):
+        s += ".IS"
+    return s
+
+
+@profiler.olculen("yfinance")
+def _yf_fiyati(ticker):
+    try:
+        profiler.api_cagrisi("yfinance")
+        info = yf.Ticker(ticker).fast_info
+        return info["last_price"], info["previous_close"]
+    except Exception as e:
+        print(f"[yfinance] {ticker} hata: {e}")
+        return 0.0, 0.0
+
+
+def _hisse_fiyati(symbol):
+    return _yf_fiyati(yf_sembol(symbol))
+
+
+def _basarili(deger):
+    try:
+        return bool(deger) and deger[0] > 0
+    except TypeError:
+        return False
+
+
+def _kaydet(anahtar, deger):
+    # Başarısız çekimde de kayıt açılır ki sayfa ilk turu tekrar tekrar beklemesin;
+    # eldeki son iyi değer korunur
+    with _kayit_kilit:
+        k = _kayitlar.setdefault(anahtar, {"deger": None, "zaman": None})
+        if _basarili(deger):
+            k["deger"], k["zaman"] = deger, time.time()
+
+
+def _yenile(anahtar, yukle):
+    try:
+        deger = yukle()
+    except Exception as e:
+        print(f"[Kotasyon] {anahtar} hata: {e}")
+        deger = None
+    _kaydet(anahtar, deger)
+    return deger
+
+
+def toplu_yenile(istekler, max_workers=HISSE_WORKERS):
+    # Süreye bakmadan verilen anahtarları paralel çeker ve cache'e yazar
+    if not istekler:
+        return
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(istekler))) as ex:
+        list(ex.map(lambda a: _yenile(a, istekler[a]), istekler))
+
+
+def onbellekte_mi(anahtar):
+    with _kayit_kilit:
+        return anahtar in _kayitlar
+
+
+def onbellekten_oku(anahtarlar, bos):
+    # Ağa çıkmadan eldeki son iyi değerleri döner
+    with _kayit_kilit:
+        return {a: (_kayitlar[a]["deger"] if a in _kayitlar else None) or bos for a in anahtarlar}
+
+
+def hisse_istekleri(symbols):
+    return {("hisse", sym): partial(_hisse_fiyati, sym) for sym in dict.fromkeys(symbols)}
+
+
+def kotasyon_yasi(anahtar):
+    # Son başarılı çekimden bu yana geçen saniye; hiç alınamadıysa None
+    with _kayit_kilit:
+        k = _kayitlar.get(anahtar)
+        return time.time() - k["zaman"] if k and k["zaman"] else None
+
+
+def hisse_yasi(symbol):
+    return kotasyon_yasi(("hisse", symbol))
+
+
+USD_ANAHTARI = ("doviz", "USDTRY=X")
+
+
+def usd_istegi():
+    return {USD_ANAHTARI: partial(_yf_fiyati, "USDTRY=X")}
+
+
+def _yeni_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=FON_WORKERS)
+    session.mount("https://", adapter)
+    session.headers.update(FINTABLES_HEADERS)
+    return session
+
+
+# Tüm Fintables istekleri aynı keep-alive bağlantı havuzunu kullanır
+fintables_session = profiler.oturumu_izle(_yeni_session(), "fintables")
+
+
+@profiler.olculen("fintables")
+def fon_fiyati(fon_kod):
+    try:
+        url = f"https://api.fintables.com/funds/{fon_kod.upper()}/price/"
+        r = fintables_session.get(url, timeout=FON_TIMEOUT)
+        if r.status_code == 200:
+            data = r.json()
+            price = float(data.get("price", 0))
+            prev_price = float(data.get("prev_price", 0))
+            gunluk_pct = ((price - prev_price) / prev_price) * 100 if prev_price > 0 else 0.0
+            return price, gunluk_pct
+    except Exception as e:
+        print(f"[Fintables] {fon_kod} hata: {e}")
+    return 0.0, 0.0
+
+
+def get_fund_prices(fon_kodlari, max_workers=FON_WORKERS, deadline=FON_DEADLINE):
+    # Süre sınırına yetişmeyen fonlar "eski" sayılır ve beklenmez
+    fon_kodlari = list(dict.fromkeys(fon_kodlari))
+    sonuc = {"fiyatlar": {}, "guncellenen": [], "eski": [], "basarisiz": []}
+    if not fon_kodlari:
+        return sonuc
+    ex = ThreadPoolExecutor(max_workers=min(max_workers, len(fon_kodlari)))
+    try:
+        isler = {ex.submit(fon_fiyati, kod): kod for kod in fon_kodlari}
+        biten, _ = wait(isler, timeout=deadline)
+        for is_, kod in isler.items():
+            if is_ not in biten:
+                sonuc["eski"].append(kod)
+                continue
+            price, pct = is_.result()
+            if price > 0:
+                sonuc["fiyatlar"][kod] = (price, pct)
+                sonuc["guncellenen"].append(kod)
+            else:
+                sonuc["basarisiz"].append(kod)
+    finally:
+        ex.shutdown(wait=False, cancel_futures=True)
+    return sonuc
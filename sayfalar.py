@@ -0,0 +1,83 @@
+import pandas as pd
+
+from parsing import safe_adet_kolon, safe_float, safe_float_cerceve, safe_float_kolon
+
+# Sheets'ten gelen ham satırların (başlık dahil) DataFrame'e dönüşümü. app.py okuyucuları ve
+# benchmark.py bunları çağırır; tablolar (sonuç, {kolon: okunamayan hücre sayısı}) olarak döner
+
+GECMIS_SAYILARI = ["ToplamVarlik", "ToplamMaliyet", "DolarKuru", "NetAnaPara", "Nakit"]
+
+
+def _cerceve(raw, doldur=False):
+    satirlar = raw[1:]
+    if doldur:
+        # Sondaki boş hücreleri Sheets göndermez; eksik hücreler "0" sayılır
+        genislik = len(raw[0])
+        satirlar = [(r + ["0"] * (genislik - len(r)))[:genislik] for r in satirlar]
+    return pd.DataFrame(satirlar, columns=raw[0])
+
+
+def islemler(raw):
+    if len(raw) < 2:
+        return pd.DataFrame(), {}
+    okunamayan = {}
+    df = _cerceve(raw)
+    df.index = range(2, len(df) + 2)
+    if "Adet" in df.columns:
+        df["Adet"], okunamayan["Adet"] = safe_adet_kolon(df["Adet"])
+    for c in ["Fiyat", "Komisyon", "Toplam"]:
+        if c in df.columns:
+            df[c], okunamayan[c] = safe_float_kolon(df[c])
+    df["Tarih"] = pd.to_datetime(df["Tarih"], dayfirst=False, errors="coerce")
+    if "Sembol" in df.columns:
+        df["Sembol"] = df["Sembol"].astype(str).str.strip().str.upper().str.replace(".IS", "")
+    return df, okunamayan
+
+
+def nakit(raw):
+    if len(raw) < 2:
+        return pd.DataFrame(columns=["Tarih", "Aciklama", "Tutar", "Tip"]), {}
+    okunamayan = {}
+    df = _cerceve(raw)
+    df.index = range(2, len(df) + 2)
+    df["Tutar"], okunamayan["Tutar"] = safe_float_kolon(df["Tutar"])
+    df["Tarih"] = pd.to_datetime(df["Tarih"], errors="coerce")
+    return df.dropna(subset=["Tarih"]).sort_values("Tarih"), okunamayan
+
+
+def varlik_kari(raw):
+    if len(raw) < 2:
+        return pd.DataFrame(), {}
+    okunamayan = {}
+    df = _cerceve(raw, doldur=True)
+    kolonlar = [c for c in df.columns if c != "Tarih"]
+    df[kolonlar], okunamayan[None] = safe_float_cerceve(df, kolonlar)
+    df["Tarih"] = pd.to_datetime(df["Tarih"], errors="coerce")
+    df = df.dropna(subset=["Tarih"])
+    return df.sort_values("Tarih", ascending=True), okunamayan
+
+
+def gecmis(raw):
+    if len(raw) < 2:
+        return pd.DataFrame(), {}
+    okunamayan = {}
+    df = _cerceve(raw, doldur=True)
+    for c in GECMIS_SAYILARI:
+        if c in df.columns:
+            df[c], okunamayan[c] = safe_float_kolon(df[c])
+        else:
+            df[c] = 0.0
+    df["Tarih"] = pd.to_datetime(df["Tarih"], errors="coerce")
+    df = df.dropna(subset=["Tarih"])
+    return df.sort_values("Tarih", ascending=True), okunamayan
+
+
+def fon_fiyatlari(raw):
+    data_dict = {}
+    for row in raw[1:]:
+        if len(row) >= 2:
+            sym = str(row[0]).strip().upper()
+            price = safe_float(row[1])
+            change_pct = safe_float(row[2]) if len(row) > 2 else 0.0
+            data_dict[sym] = {"fiyat": price, "yuzde": change_pct}
+    return data_dict
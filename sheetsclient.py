@@ -0,0 +1,170 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import requests
+from urllib3.exceptions import NewConnectionError
+from gspread.exceptions import APIError
+from gspread.http_client import HTTPClient
+
+# Sheets API kotası kullanıcı başına dakikada 60 okuma ve 60 yazma isteğidir
+OKUMA_KOTASI = float(os.environ.get("PORTFOY_SHEETS_READS_PER_MINUTE", 60))
+YAZMA_KOTASI = float(os.environ.get("PORTFOY_SHEETS_WRITES_PER_MINUTE", 60))
+DENEME_SAYISI = 5
+BEKLEME_TABANI = 1.0
+EN_UZUN_BEKLEME = 32.0
+# Okumalarda 408 zaman aşımı, 429 kota aşımı ve 5xx tekrar denenir. Yazmalarda
+# sadece 429: 5xx ve kopan bağlantıda istek sunucuda uygulanmış olabilir
+TEKRAR_KODLARI = {408, 429}
+
+_kilit = threading.Lock()
+_ucustaki = {}
+_son_istekler = {"okuma": deque(), "yazma": deque()}
+sayac = {"bekleme": 0.0, "tekrar": 0, "kota_asimi": 0, "birlesen": 0, "hata": 0, "son_hata": None}
+
+
+class _Kova:
+    # Token kovası: dakikalık kota kadar birikir, saniyede kota/60 token dolar.
+    # Token yoksa istek eksiye rezerve edilir ve sırası gelene kadar bekler
+
+    def __init__(self, dakikalik):
+        self.kapasite = dakikalik
+        self.hiz = dakikalik / 60.0
+        self.token = dakikalik
+        self.zaman = time.monotonic()
+
+    def _doldur(self, simdi):
+        self.token = min(self.kapasite, self.token + (simdi - self.zaman) * self.hiz)
+        self.zaman = simdi
+
+    def al(self):
+        with _kilit:
+            self._doldur(time.monotonic())
+            self.token -= 1
+            bekleme = -self.token / self.hiz if self.token < 0 else 0.0
+        if bekleme:
+            time.sleep(bekleme)
+        return bekleme
+
+    def bosalt(self):
+        # 429 geldiyse sunucu kotayı bizden önce doldurmuş demektir
+        with _kilit:
+            self._doldur(time.monotonic())
+            self.token = min(self.token, 0.0)
+
+    def kalan(self):
+        with _kilit:
+            self._doldur(time.monotonic())
+            return self.token
+
+
+_kovalar = {"okuma": _Kova(OKUMA_KOTASI), "yazma": _Kova(YAZMA_KOTASI)}
+
+
+def _dondur(deger):
+    if isinstance(deger, dict):
+        return tuple(sorted((k, _dondur(v)) for k, v in deger.items()))
+    if isinstance(deger, (list, tuple)):
+        return tuple(_dondur(v) for v in deger)
+    return deger
+
+
+def _istek_say(tur):
+    simdi = time.monotonic()
+    with _kilit:
+        istekler = _son_istekler[tur]
+        istekler.append(simdi)
+        while istekler and simdi - istekler[0] > 60:
+            istekler.popleft()
+
+
+def _gonderilmedi(e):
+    # Bağlantı hiç kurulamadıysa istek sunucuya ulaşmamıştır
+    if isinstance(e, requests.exceptions.ConnectTimeout):
+        return True
+    neden = getattr(e.args[0], "reason", None) if e.args else None
+    return isinstance(neden, NewConnectionError)
+
+
+def kota_durumu():
+    simdi = time.monotonic()
+    with _kilit:
+        son_dakika = {tur: sum(1 for t in istekler if simdi - t <= 60) for tur, istekler in _son_istekler.items()}
+        sonuc = dict(sayac)
+    sonuc.update(
+        okuma=son_dakika["okuma"], yazma=son_dakika["yazma"],
+        okuma_kotasi=OKUMA_KOTASI, yazma_kotasi=YAZMA_KOTASI,
+        okuma_kalan=_kovalar["okuma"].kalan(), yazma_kalan=_kovalar["yazma"].kalan(),
+    )
+    return sonuc
+
+
+class KotaliHTTPClient(HTTPClient):
+    # gspread'in tüm istekleri buradan geçer: okuma/yazma kotası token kovasıyla
+    # yayılır, okumalarda 429/5xx, yazmalarda sadece 429 ve kurulamayan bağlantı üstel
+    # beklemeyle tekrar denenir, aynı anda yapılan aynı GET isteği tek istekte birleştirilir
+
+    def _dene(self, tur, method, endpoint, **kwargs):
+        for deneme in range(DENEME_SAYISI + 1):
+            bekleme = _kovalar[tur].al()
+            _istek_say(tur)
+            with _kilit:
+                sayac["bekleme"] += bekleme
+            try:
+                return super().request(method, endpoint, **kwargs)
+            except APIError as e:
+                kod = e.code
+                if kod == 429:
+                    _kovalar[tur].bosalt()
+                    with _kilit:
+                        sayac["kota_asimi"] += 1
+                tekrar = kod == 429 if tur == "yazma" else (kod in TEKRAR_KODLARI or kod >= 500)
+                if not tekrar or deneme == DENEME_SAYISI:
+                    self._hata(e)
+                    raise
+                neden = kod
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if (tur == "yazma" and not _gonderilmedi(e)) or deneme == DENEME_SAYISI:
+                    self._hata(e)
+                    raise
+                neden = type(e).__name__
+            sure = min(EN_UZUN_BEKLEME, BEKLEME_TABANI * 2 ** deneme) + random.uniform(0, BEKLEME_TABANI)
+            with _kilit:
+                sayac["tekrar"] += 1
+            print(f"[Sheets] {method} {neden}, {sure:.1f} sn sonra tekrar denenecek ({deneme + 1}/{DENEME_SAYISI})")
+            time.sleep(sure)
+
+    def _hata(self, e):
+        with _kilit:
+            sayac["hata"] += 1
+            sayac["son_hata"] = str(e)
+
+    def request(self, method, endpoint, params=None, data=None, json=None, files=None, headers=None):
+        kwargs = {"params": params, "data": data, "json": json, "files": files, "headers": headers}
+        if method.upper() != "GET":
+            return self._dene("yazma", method, endpoint, **kwargs)
+        anahtar = (endpoint, _dondur(params))
+        with _kilit:
+            is_ = _ucustaki.get(anahtar)
+            sahip = is_ is None
+            if sahip:
+                is_ = _ucustaki[anahtar] = {"olay": threading.Event(), "yanit": None, "hata": None}
+            else:
+                sayac["birlesen"] += 1
+        if not sahip:
+            is_["olay"].wait()
+            if is_["hata"] is not None:
+                raise is_["hata"]
+            return is_["yanit"]
+        try:
+            is_["yanit"] = self._dene("okuma", method, endpoint, **kwargs)
+            return is_["yanit"]
+        except Exception as e:
+            is_["hata"] = e
+            raise
+        finally:
+            with _kilit:
+                _ucustaki.pop(anahtar, None)
+            is_["olay"].set()
@@ -0,0 +1,70 @@
+from datetime import datetime
+
+from gspread.utils import rowcol_to_a1
+
+import profiler
+
+
+@profiler.olculen("save_daily_snapshot")
+def save_daily_snapshot(depo, tv, tm, dk, net_ana, nakit):
+    if tv < 100 and tm > 1000:
+        return
+    baslik, a_sutunu = depo.degerler(["Gecmis!1:1", "Gecmis!A:A"])
+    if baslik is None:
+        depo.sayfa_olustur("Gecmis", ["Tarih", "ToplamVarlik", "ToplamMaliyet", "DolarKuru", "NetAnaPara", "Nakit"], 1000, 6)
+        baslik, a_sutunu = depo.degerler(["Gecmis!1:1", "Gecmis!A:A"])
+
+    current_header = baslik[0] if baslik else []
+    if "Nakit" not in current_header:
+        new_header = current_header + ["Nakit"]
+        depo.guncelle("Gecmis", [{"range": "A1:" + chr(64 + len(new_header)) + "1", "values": [new_header]}])
+        current_header = new_header
+
+    nakit_col = current_header.index("Nakit") + 1
+    bugun = datetime.now().strftime("%Y-%m-%d")
+    dates = [r[0] if r else "" for r in a_sutunu]
+    d = [bugun, str(tv).replace(".", ","), str(tm).replace(".", ","),
+         str(dk).replace(".", ","), str(net_ana).replace(".", ",")]
+
+    if bugun not in dates:
+        depo.satir_ekle("Gecmis", [d + [str(nakit).replace(".", ",")]])
+    else:
+        idx = dates.index(bugun) + 1
+        depo.guncelle("Gecmis", [
+            {"range": f"B{idx}:E{idx}", "values": [d[1:]]},
+            {"range": rowcol_to_a1(idx, nakit_col), "values": [[str(nakit).replace(".", ",")]]},
+        ], value_input_option="USER_ENTERED")
+
+
+@profiler.olculen("save_asset_snapshots")
+def save_asset_snapshots(depo, liste):
+    bugun = datetime.now().strftime("%Y-%m-%d")
+    baslik, a_sutunu = depo.degerler(["VarlikKari!1:1", "VarlikKari!A:A"])
+    if baslik is None:
+        depo.sayfa_olustur("VarlikKari", ["Tarih"], 1000, 26)
+        baslik, a_sutunu = depo.degerler(["VarlikKari!1:1", "VarlikKari!A:A"])
+    headers = baslik[0] if baslik else []
+    if not headers:
+        headers = ["Tarih"]
+    data_dict = {item["Varlık"]: str(item["K/Z (%)"]).replace(".", ",") for item in liste
+                 if item["K/Z (%)"] != float('inf')}
+    added_header = False
+    for sym in data_dict.keys():
+        if sym not in headers:
+            headers.append(sym)
+            added_header = True
+    dates = [r[0] if r else "" for r in a_sutunu]
+    row_data = [bugun]
+    for h in headers[1:]:
+        row_data.append(data_dict.get(h, "0"))
+    # Başlık ve bugünün satırı tek values:batchUpdate isteğiyle yazılır
+    guncellemeler = []
+    if added_header:
+        guncellemeler.append({"range": f"A1:{rowcol_to_a1(1, len(headers))}", "values": [headers]})
+    if bugun in dates:
+        r_idx = dates.index(bugun) + 1
+        guncellemeler.append({"range": f"A{r_idx}:{rowcol_to_a1(r_idx, len(row_data))}", "values": [row_data]})
+    if guncellemeler:
+        depo.guncelle("VarlikKari", guncellemeler, value_input_option="USER_ENTERED")
+    if bugun not in dates:
+        depo.satir_ekle("VarlikKari", [row_data])
@@ -0,0 +1,220 @@
+import csv
+import numbers
+import os
+import threading
+
+import gspread
+from gspread.utils import a1_range_to_grid_range
+
+import mirror
+
+SAYFALAR = mirror.SAYFALAR
+
+
+def _kirp(satirlar):
+    # Sheets API gibi sondaki boş hücre ve satırları atar
+    sonuc = []
+    for r in satirlar:
+        r = list(r)
+        while r and r[-1] == "":
+            r.pop()
+        sonuc.append(r)
+    while sonuc and not sonuc[-1]:
+        sonuc.pop()
+    return sonuc
+
+
+def _hucre_verisi(v):
+    # append_rows'un RAW girişi gibi: sayılar sayı, geri kalan her şey metin olarak yazılır
+    if isinstance(v, bool):
+        return {"userEnteredValue": {"boolValue": v}}
+    if isinstance(v, numbers.Number):
+        return {"userEnteredValue": {"numberValue": float(v)}}
+    return {"userEnteredValue": {"stringValue": str(v)}}
+
+
+class SheetsStorage:
+    # Okumalar yerel mirror'dan, yazmalar önce mirror'a sonra Google Sheets'e yapılır
+
+    def __init__(self, client_ac, sheet_id, mirror_yol):
+        self.client_ac = client_ac
+        self.sheet_id = sheet_id
+        self.mirror_yol = mirror_yol
+        self._spreadsheet = None
+        self._ws = {}
+        self._kilit = threading.Lock()
+        self.son_hata = None
+
+    def spreadsheet(self):
+        with self._kilit:
+            if self._spreadsheet is None:
+                self._spreadsheet = self.client_ac().open_by_key(self.sheet_id)
+            return self._spreadsheet
+
+    def worksheet(self, sayfa):
+        ws = self._ws.get(sayfa)
+        if ws is None:
+            ws = self._ws[sayfa] = self.spreadsheet().worksheet(sayfa)
+        return ws
+
+    def _senkronize(self):
+        try:
+            mirror.senkronize(self.mirror_yol, self.spreadsheet)
+            self.son_hata = None
+        except Exception as e:
+            self.son_hata = str(e)
+            print(f"[Mirror] senkron hatası, yerel kopya kullanılıyor: {e}")
+
+    def oku(self, sayfalar=SAYFALAR):
+        self._senkronize()
+        return {ad: mirror.yerel_oku(self.mirror_yol, ad) for ad in sayfalar}
+
+    def surum(self, sayfa):
+        # Sayfa içeriği değiştikçe artar; türetilmiş veriler bu sürümle önbelleklenir
+        self._senkronize()
+        return mirror.surum(self.mirror_yol, sayfa)
+
+    def degerler(self, araliklar):
+        # Yazmadan önce gereken taze değerler; olmayan sayfa için None döner
+        spreadsheet = self.spreadsheet()
+        mevcut = list(araliklar)
+        try:
+            yanit = spreadsheet.values_batch_get(mevcut)
+        except gspread.exceptions.APIError:
+            basliklar = {ws.title for ws in spreadsheet.worksheets()}
+            mevcut = [a for a in araliklar if a.split("!")[0] in basliklar]
+            yanit = spreadsheet.values_batch_get(mevcut) if mevcut else {}
+        okunan = dict(zip(mevcut, yanit.get("valueRanges", [])))
+        return [okunan[a].get("values", []) if a in okunan else None for a in araliklar]
+
+    def sayfa_olustur(self, sayfa, baslik, satir=1000, sutun=26):
+        ws = self.spreadsheet().add_worksheet(sayfa, satir, sutun)
+        self._ws[sayfa] = ws
+        ws.append_row(baslik)
+        mirror.yerel_yaz(self.mirror_yol, sayfa, [baslik])
+
+    def satir_ekle(self, sayfa, satirlar):
+        # Mirror'a sadece Sheets'e yazıldıktan sonra eklenir; hata olursa yerelde hayalet satır kalmaz
+        try:
+            self.worksheet(sayfa).append_rows(satirlar)
+        except Exception:
+            mirror.isaretle(self.mirror_yol)
+            raise
+        if mirror.yerel_mevcut(self.mirror_yol, sayfa):
+            mirror.yerel_ekle_toplu(self.mirror_yol, {sayfa: satirlar})
+
+    def satirlar_ekle(self, eklemeler):
+        # {sayfa: satırlar}; tek spreadsheets.batchUpdate isteği. Sheets istekteki tüm
+        # appendCells'i birlikte uygular ya da hiçbirini uygulamaz. Mirror'a istek
+        # başarılı olduktan sonra yazılır; istek hata verirse uygulanmış olabilir,
+        # mirror sayfadan yeniden okunur
+        eklemeler = {sayfa: satirlar for sayfa, satirlar in eklemeler.items() if satirlar}
+        istekler = [
+            {"appendCells": {
+                "sheetId": self.worksheet(sayfa).id,
+                "rows": [{"values": [_hucre_verisi(v) for v in satir]} for satir in satirlar],
+                "fields": "userEnteredValue",
+            }}
+            for sayfa, satirlar in eklemeler.items()
+        ]
+        if not istekler:
+            return
+        try:
+            self.spreadsheet().batch_update({"requests": istekler})
+        except Exception:
+            mirror.isaretle(self.mirror_yol)
+            raise
+        try:
+            mirror.yerel_ekle_toplu(self.mirror_yol, {
+                sayfa: satirlar for sayfa, satirlar in eklemeler.items()
+                if mirror.yerel_mevcut(self.mirror_yol, sayfa)
+            })
+        except Exception:
+            mirror.isaretle(self.mirror_yol)
+            raise
+
+    def guncelle(self, sayfa, guncellemeler, value_input_option="RAW"):
+        try:
+            self.worksheet(sayfa).batch_update(guncellemeler, value_input_option=value_input_option)
+        except Exception:
+            mirror.isaretle(self.mirror_yol)
+            raise
+        for g in guncellemeler:
+            mirror.yerel_guncelle(self.mirror_yol, sayfa, g["range"], g["values"])
+        mirror.isaretle(self.mirror_yol)
+
+    def satir_sil(self, sayfa, satir_no):
+        try:
+            self.worksheet(sayfa).delete_rows(int(satir_no))
+        except Exception:
+            mirror.isaretle(self.mirror_yol)
+            raise
+        mirror.yerel_sil(self.mirror_yol, sayfa, int(satir_no))
+
+    def yenile(self):
+        mirror.isaretle(self.mirror_yol, tam=True)
+
+
+class LocalStorage:
+    # Google hesabı ve ağ olmadan çalışan SQLite deposu; şema mirror ile aynıdır
+    son_hata = None
+
+    def __init__(self, yol, tohum_csv=None):
+        self.yol = yol
+        if tohum_csv and os.path.exists(tohum_csv) and not mirror.yerel_mevcut(yol, "Islemler"):
+            with open(tohum_csv, newline="", encoding="utf-8") as f:
+                satirlar = [r for r in csv.reader(f)]
+            for r in satirlar[1:]:
+                # Islemler sayfasındaki gibi ondalık ayırıcı virgül
+                r[4:] = [v.replace(".", ",") for v in r[4:]]
+            mirror.yerel_yaz(yol, "Islemler", satirlar)
+
+    def oku(self, sayfalar=SAYFALAR):
+        return {ad: mirror.yerel_oku(self.yol, ad) for ad in sayfalar}
+
+    def surum(self, sayfa):
+        return mirror.surum(self.yol, sayfa)
+
+    def degerler(self, araliklar):
+        sonuc = []
+        for aralik in araliklar:
+            sayfa, _, a1 = aralik.partition("!")
+            satirlar = mirror.yerel_oku(self.yol, sayfa)
+            if satirlar is None:
+                sonuc.append(None)
+                continue
+            if a1:
+                g = a1_range_to_grid_range(a1)
+                satirlar = [
+                    r[g.get("startColumnIndex", 0):g.get("endColumnIndex")]
+                    for r in satirlar[g.get("startRowIndex", 0):g.get("endRowIndex")]
+                ]
+            sonuc.append(_kirp(satirlar))
+        return sonuc
+
+    def sayfa_olustur(self, sayfa, baslik, satir=1000, sutun=26):
+        mirror.yerel_yaz(self.yol, sayfa, [baslik])
+
+    def satir_ekle(self, sayfa, satirlar):
+        for satir in satirlar:
+            mirror.yerel_ekle(self.yol, sayfa, satir)
+
+    def satirlar_ekle(self, eklemeler):
+        mirror.yerel_ekle_toplu(self.yol, eklemeler)
+
+    def guncelle(self, sayfa, guncellemeler, value_input_option="RAW"):
+        for g in guncellemeler:
+            mirror.yerel_guncelle(self.yol, sayfa, g["range"], g["values"])
+
+    def satir_sil(self, sayfa, satir_no):
+        mirror.yerel_sil(self.yol, sayfa, int(satir_no))
+
+    def yenile(self):
+        pass
+
+
+def depo_ac(backend, client_ac=None, sheet_id=None, mirror_yol=None, yerel_yol=None, tohum_csv=None):
+    if backend == "local":
+        return LocalStorage(yerel_yol, tohum_csv=tohum_csv)
+    return SheetsStorage(client_ac, sheet_id, mirror_yol)
+
@@ -0,0 +1,55 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from ledger import YAS_SINIRLARI, LotDefteri, calculate_portfolio_unified, yas_kovasi_adlari
+
+BUGUN = datetime(2025, 12, 31)
+
+
+def _ns(tarih):
+    return pd.Timestamp(tarih).value
+
+
+def test_yas_kovalari_kalan_lotlar():
+    # FIFO satış en eski lotu tüketir; kalanlar yaşlarına göre kovalara düşer
+    defter = LotDefteri()
+    defter.ekle(10.0, _ns("2024-01-01"))
+    defter.ekle(5.0, _ns("2025-09-01"))
+    defter.ekle(3.0, _ns("2025-12-20"))
+    defter.tuket(4.0)
+    np.testing.assert_array_equal(defter.yas_kovalari(BUGUN), [3.0, 0.0, 5.0, 6.0])
+
+
+def test_yas_kovalari_sinirlar_ve_tarihsiz_lot():
+    # Sınır günü üst kovaya girer; tarihi olmayan lot 1 gün sayılır
+    defter = LotDefteri()
+    defter.ekle(2.0, _ns(pd.Timestamp(BUGUN) - pd.Timedelta(days=30)))
+    defter.ekle(7.0, np.iinfo(np.int64).min)
+    np.testing.assert_array_equal(defter.yas_kovalari(BUGUN, sinirlar=(30,)), [7.0, 2.0])
+
+
+def test_yas_kovalari_bos_defter():
+    np.testing.assert_array_equal(LotDefteri().yas_kovalari(BUGUN), np.zeros(len(YAS_SINIRLARI) + 1))
+
+
+def test_yas_kovalari_toplami_pozisyon_adedi():
+    df = pd.DataFrame({
+        "Tarih": pd.to_datetime(["2024-03-01", "2025-06-01", "2025-11-15", "2025-12-01", "2025-12-30"]),
+        "Tur": "Hisse",
+        "Islem": ["ALIS", "ALIS", "SATIS", "ALIS", "SATIS"],
+        "Sembol": "ABC",
+        "Adet": [100.0, 50.0, 120.0, 40.0, 10.0],
+        "Toplam": [1000.0, 600.0, 1500.0, 500.0, 130.0],
+    })
+    portfolio, _, _ = calculate_portfolio_unified(df)
+    poz = portfolio["ABC"]
+    kovalar = poz["Alimlar"].yas_kovalari(BUGUN)
+    assert kovalar.sum() == poz["Adet"] == 60.0
+    # 2025-06-01 lotundan 20, 30 günlük 2025-12-01 lotundan 40 adet kalır
+    np.testing.assert_array_equal(kovalar, [0.0, 40.0, 20.0, 0.0])
+
+
+def test_yas_kovasi_adlari():
+    assert yas_kovasi_adlari() == ["<30 gün", "30-90 gün", "90-365 gün", "≥365 gün"]
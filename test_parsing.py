@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from parsing import safe_adet, safe_adet_kolon, safe_float, safe_float_cerceve, safe_float_kolon
+
+# Sheets'ten gelebilecek hücreler: boşluklar, eksik değerler, iki ayırıcı düzeni, \xa0 ve bozuk metin
+HUCRELER = [
+    "", " ", None, np.nan, "0", "12", "12,5", "12.5", "1.234,56", "1,234.56", "1.234.560,00",
+    "1.234", "-3,75", " 7,25 ", "1\xa0234,5", "\xa0", "1 234", "abc", "12a", "--", "%5",
+    0, 3, 2.5, -1.25,
+]
+# Karşılığı okunamayan ve boş olmayan hücreler
+FLOAT_HATALI = {"1\xa0234,5", "1 234", "abc", "12a", "--", "%5"}
+ADET_HATALI = {"abc", "12a", "--", "%5"}
+
+
+def _ayni(a, b):
+    np.testing.assert_array_equal(np.asarray(a, dtype=float), np.asarray(b, dtype=float))
+
+
+@pytest.mark.parametrize("kolon, skaler, hatali", [
+    (safe_float_kolon, safe_float, FLOAT_HATALI),
+    (safe_adet_kolon, safe_adet, ADET_HATALI),
+])
+def test_kolon_skaler_ile_ayni(kolon, skaler, hatali):
+    seri = pd.Series(HUCRELER * 3, index=range(10, 10 + 3 * len(HUCRELER)), name="Fiyat")
+    sonuc, okunamayan = kolon(seri)
+    _ayni(sonuc, [skaler(v) for v in seri])
+    assert sonuc.index.equals(seri.index) and sonuc.name == "Fiyat"
+    assert okunamayan == 3 * sum(1 for v in HUCRELER if isinstance(v, str) and v in hatali)
+
+
+def test_skaler_degerler():
+    assert safe_float("1.234,56") == 1234.56
+    assert safe_float("12.5") == 12.5
+    assert safe_float("abc") == 0.0
+    assert safe_float(None) == 0.0
+    assert safe_adet("1.234") == 1234.0
+    assert safe_adet("1\xa0234,5") == 1234.5
+    assert safe_adet("1 234") == 1234.0
+
+
+def test_sayisal_kolon():
+    seri = pd.Series([1, 2, 3])
+    sonuc, okunamayan = safe_float_kolon(seri)
+    assert sonuc.dtype == float and okunamayan == 0
+    _ayni(sonuc, [1.0, 2.0, 3.0])
+
+
+def test_none_ve_nan_ayri_cozulur():
+    # factorize ikisini aynı kod sayar; safe_float None'ı 0, NaN'ı NaN yapar
+    sonuc, okunamayan = safe_float_kolon(pd.Series([None, np.nan, None, "1,5"], dtype=object))
+    _ayni(sonuc, [0.0, np.nan, 0.0, 1.5])
+    assert okunamayan == 0
+
+
+def test_cerceve_kolon_kolon_ile_ayni():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "Tarih": ["2025-01-01"] * 200,
+        **{f"S{i}": rng.choice(np.array(HUCRELER, dtype=object), 200) for i in range(6)},
+    })
+    kolonlar = [c for c in df.columns if c != "Tarih"]
+    sonuc, okunamayan = safe_float_cerceve(df, kolonlar)
+    toplam = 0
+    for c in kolonlar:
+        beklenen, n = safe_float_kolon(df[c])
+        _ayni(sonuc[c], beklenen)
+        _ayni(sonuc[c], [safe_float(v) for v in df[c]])
+        toplam += n
+    assert okunamayan == toplam
+    assert list(sonuc.columns) == kolonlar and sonuc.index.equals(df.index)
+
+
+def test_bos_cerceve():
+    sonuc, okunamayan = safe_float_cerceve(pd.DataFrame({"Tarih": [], "A": []}), ["A"])
+    assert sonuc.empty and okunamayan == 0
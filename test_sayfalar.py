@@ -0,0 +1,46 @@
+import pandas as pd
+
+import sayfalar
+
+
+def test_islemler_satir_numarasi_ve_okunamayan():
+    raw = [
+        ["Tarih", "Tur", "Islem", "Sembol", "Adet", "Fiyat", "Komisyon", "Toplam"],
+        ["2025-01-02", "Hisse", "ALIS", " thyao.is ", "10", "12,5", "0", "125"],
+        ["2025-01-03", "Hisse", "SATIS", "THYAO", "abc", "13,0", "0", "130"],
+    ]
+    df, okunamayan = sayfalar.islemler(raw)
+    # Index Sheets satır numarasıdır; silme işlemleri buna göre yapılır
+    assert list(df.index) == [2, 3]
+    assert list(df["Sembol"]) == ["THYAO", "THYAO"]
+    assert df["Fiyat"].tolist() == [12.5, 13.0]
+    assert okunamayan == {"Adet": 1, "Fiyat": 0, "Komisyon": 0, "Toplam": 0}
+
+
+def test_gecmis_eksik_hucre_ve_kolon():
+    raw = [
+        ["Tarih", "ToplamVarlik", "ToplamMaliyet"],
+        ["2025-01-03", "200,5"],
+        ["2025-01-02", "100", "90"],
+        ["bozuk", "1", "1"],
+    ]
+    df, okunamayan = sayfalar.gecmis(raw)
+    assert df["Tarih"].tolist() == list(pd.to_datetime(["2025-01-02", "2025-01-03"]))
+    assert df["ToplamMaliyet"].tolist() == [90.0, 0.0]
+    assert df["Nakit"].tolist() == [0.0, 0.0]
+    assert set(okunamayan) == {"ToplamVarlik", "ToplamMaliyet"}
+
+
+def test_bos_sayfalar():
+    for oku in (sayfalar.islemler, sayfalar.nakit, sayfalar.gecmis, sayfalar.varlik_kari):
+        df, okunamayan = oku([["Tarih"]])
+        assert df.empty and okunamayan == {}
+    assert list(sayfalar.nakit([])[0].columns) == ["Tarih", "Aciklama", "Tutar", "Tip"]
+
+
+def test_fon_fiyatlari():
+    raw = [["Fon Kodu", "Fiyat", "Günlük %", "2025-01-02 10:00:00"], ["ppn ", "1,25", "-0,5"], ["AFT", "2"], ["X"]]
+    assert sayfalar.fon_fiyatlari(raw) == {
+        "PPN": {"fiyat": 1.25, "yuzde": -0.5},
+        "AFT": {"fiyat": 2.0, "yuzde": 0.0},
+    }
@@ -0,0 +1,29 @@
+import pandas as pd
+from openpyxl import Workbook
+
+from transactions import ice_aktarim_plani
+
+BOS = pd.DataFrame(columns=["Tarih", "Islem", "Sembol", "Adet", "Toplam"])
+
+
+def _excel(yol, satirlar):
+    wb = Workbook()
+    for satir in satirlar:
+        wb.active.append(satir)
+    wb.save(yol)
+    return str(yol)
+
+
+def test_excel_bos_sembol_hatali_sayilir(tmp_path):
+    # openpyxl boş hücreyi None verir; "NONE" sembollü işlem olarak içe alınmamalı
+    dosya = _excel(tmp_path / "islemler.xlsx", [
+        ["Tarih", "Tur", "Islem", "Sembol", "Adet", "Fiyat", "Komisyon", "Toplam"],
+        ["2025-01-02", "Hisse", "Alis", "ASELS", 10, 12.5, None, None],
+        ["2025-01-03", "Hisse", "Alis", None, 5, 20, None, None],
+        ["2025-01-04", None, "Satis", "ASELS", 4, 13, 1, None],
+    ])
+    yeni, ozet = ice_aktarim_plani(dosya, "islemler.xlsx", BOS)
+    assert ozet["okunan"] == 3 and ozet["hatali"] == 1 and ozet["yeni"] == 2
+    assert list(yeni["Sembol"]) == ["ASELS", "ASELS"]
+    assert list(yeni["Tur"]) == ["Hisse", "Hisse"]
+    assert list(yeni["Toplam"]) == [125.0, 51.0]
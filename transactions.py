@@ -0,0 +1,209 @@
+import itertools
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from ledger import normalize_islem_kolon
+
+ISLEM_KOLONLARI = ["Tarih", "Tur", "Islem", "Sembol", "Adet", "Fiyat", "Komisyon", "Toplam"]
+ZORUNLU_KOLONLAR = ["Tarih", "Islem", "Sembol", "Adet"]
+SAYI_KOLONLARI = ["Adet", "Fiyat", "Komisyon", "Toplam"]
+OKUMA_PARCASI = 5000
+# Bir satirlar_ekle isteğine giren en fazla işlem; büyük dosyalar birkaç istekte yazılır
+YAZMA_PARCASI = 5000
+
+
+def sembol_tur_belirle(sembol):
+    return "Fon" if len(sembol.strip()) == 3 else "Hisse"
+
+
+def islem_satirlari(veri, fon_kayitlari, nakit=True):
+    # Bir işlemin Islemler satırı, gerekirse Fiyatlar'a fon kaydı ve karşılık gelen nakit hareketi
+    islem_yaz = "Alis" if veri["Islem"] in ["Alış", "Alis"] else "Satis"
+    eklemeler = {"Islemler": [[
+        veri["Tarih"], veri["Tur"], islem_yaz, veri["Sembol"], veri["Adet"],
+        str(veri["Fiyat"]).replace(".", ","),
+        str(veri["Komisyon"]).replace(".", ","),
+        str(veri["Toplam"]).replace(".", ",")
+    ]], "Fiyatlar": [], "Nakit": []}
+    if fon_kayitlari is not None and veri["Tur"] == "Fon" and veri["Sembol"] not in fon_kayitlari:
+        eklemeler["Fiyatlar"].append([veri["Sembol"], 0, 0])
+        fon_kayitlari.add(veri["Sembol"])
+    if not nakit:
+        return eklemeler
+    toplam = float(veri["Toplam"])
+    if veri["Islem"] in ["Satış", "Satis"] and toplam > 0:
+        eklemeler["Nakit"].append([veri["Tarih"], f"{veri['Sembol']} satis geliri", str(toplam).replace(".", ","), "Giriş"])
+    elif veri["Islem"] in ["Alış", "Alis"] and toplam > 0:
+        eklemeler["Nakit"].append([veri["Tarih"], f"{veri['Sembol']} alis odemesi", str(toplam).replace(".", ","), "Çıkış"])
+    return eklemeler
+
+
+def _excel_parcalari(dosya, parca):
+    wb = load_workbook(dosya, read_only=True, data_only=True)
+    try:
+        satirlar = wb.active.iter_rows(values_only=True)
+        baslik = [str(h).strip() if h is not None else "" for h in next(satirlar, ())]
+        while True:
+            blok = list(itertools.islice(satirlar, parca))
+            if not blok:
+                break
+            yield pd.DataFrame([r[:len(baslik)] for r in blok], columns=baslik)
+    finally:
+        wb.close()
+
+
+def parcalar_oku(dosya, ad, parca=OKUMA_PARCASI):
+    # Dosya bütün halinde belleğe alınmadan parça parça okunur
+    if ad.lower().endswith((".xlsx", ".xlsm")):
+        yield from _excel_parcalari(dosya, parca)
+        return
+    okuyucu = pd.read_csv(dosya, dtype=str, keep_default_na=False, sep=None, engine="python",
+                          encoding="utf-8-sig", chunksize=parca)
+    for blok in okuyucu:
+        blok.columns = [str(c).strip() for c in blok.columns]
+        yield blok
+
+
+def _ayirici_ipucu(metin):
+    # Hücreden kesin anlaşılan ondalık ayırıcı: iki ayırıcı birlikteyse sondaki, bir ayırıcı
+    # birden çok geçiyorsa diğeri, bir kez geçip ardından 3 hane gelmiyorsa kendisi
+    s = metin.replace("\xa0", "").replace(" ", "")
+    nokta, virgul = s.count("."), s.count(",")
+    if nokta and virgul:
+        return "," if s.rfind(",") > s.rfind(".") else "."
+    for ayirici, diger, sayi in ((".", ",", nokta), (",", ".", virgul)):
+        if sayi > 1:
+            return diger
+        if sayi == 1 and len(s) - s.rfind(ayirici) - 1 != 3:
+            return ayirici
+    return None
+
+
+def ondalik_ayirici(parca):
+    # Parçanın sayı hücrelerinde çoğunluğun kullandığı ondalık ayırıcı; ipucu yoksa None
+    ipuclari = Counter(
+        _ayirici_ipucu(v) for kolon in SAYI_KOLONLARI if kolon in parca.columns
+        for v in pd.unique(parca[kolon]) if isinstance(v, str)
+    )
+    ipuclari.pop(None, None)
+    return ipuclari.most_common(1)[0][0] if ipuclari else None
+
+
+def _sayi_coz(deger, ondalik):
+    # Boş hücre NaN, okunamayan hücre None. Binlik gruplar 3 haneli olmalı; 1.234,5 ve
+    # 1,234.5 karışık gelirse dosyanın ayırıcısına uymayan hücre okunamaz sayılır
+    if isinstance(deger, (int, float)):
+        return float(deger)
+    s = str(deger).replace("\xa0", "").replace(" ", "")
+    if s == "":
+        return np.nan
+    binlik = "," if ondalik == "." else "."
+    tam, ayirici, kesir = s.partition(ondalik)
+    if ondalik in kesir or binlik in kesir or any(len(g) != 3 for g in tam.split(binlik)[1:]):
+        return None
+    try:
+        sayi = float(tam.replace(binlik, "") + ("." if ayirici else "") + kesir)
+    except ValueError:
+        return None
+    return sayi if np.isfinite(sayi) else None
+
+
+def _sayi(parca, kolon, ondalik):
+    # (değerler, okunamayan hücre maskesi); her benzersiz hücre bir kez çözülür
+    if kolon not in parca.columns:
+        return pd.Series(np.nan, index=parca.index), pd.Series(False, index=parca.index)
+    kodlar, benzersiz = pd.factorize(parca[kolon])
+    cozulen = [_sayi_coz(v, ondalik) for v in benzersiz]
+    hatali = np.array([c is None for c in cozulen] + [False])
+    tablo = np.array([np.nan if c is None else c for c in cozulen] + [np.nan], dtype=float)
+    # factorize eksik değerlere -1 verir; tablonun son elemanı boş hücredir
+    return pd.Series(tablo[kodlar], index=parca.index), pd.Series(hatali[kodlar], index=parca.index)
+
+
+def _metin(parca, kolon):
+    # Excel'in boş hücresi None gelir; astype(str) onu "None" yapıp dolu saymasın
+    return parca[kolon].fillna("").astype(str)
+
+
+def parcayi_normalize(parca, ondalik="."):
+    # (geçerli satırlar, geçersiz satır sayısı); tarih, işlem yönü, sembol veya adedi
+    # okunamayan, dolu bir sayı hücresi çözülemeyen ya da fiyatı ve tutarı olmayan satırlar atlanır
+    eksik = [k for k in ZORUNLU_KOLONLAR if k not in parca.columns]
+    if eksik or ("Fiyat" not in parca.columns and "Toplam" not in parca.columns):
+        raise ValueError(f"Eksik kolon: {', '.join(eksik) or 'Fiyat / Toplam'}")
+    df = pd.DataFrame(index=parca.index)
+    df["Tarih"] = pd.to_datetime(parca["Tarih"], dayfirst=False, errors="coerce")
+    df["Sembol"] = _metin(parca, "Sembol").str.strip().str.upper().str.replace(".IS", "")
+    df["Islem"] = normalize_islem_kolon(_metin(parca, "Islem"))
+    tur = _metin(parca, "Tur").str.strip().str.capitalize() if "Tur" in parca.columns else pd.Series("", index=parca.index)
+    df["Tur"] = np.where(tur.isin(["Fon", "Hisse"]), tur, [sembol_tur_belirle(s) for s in df["Sembol"]])
+    sayilar = {kolon: _sayi(parca, kolon, ondalik) for kolon in SAYI_KOLONLARI}
+    okunamayan = np.logical_or.reduce([h.to_numpy() for _, h in sayilar.values()])
+    df["Adet"] = sayilar["Adet"][0]
+    fiyat, toplam = sayilar["Fiyat"][0], sayilar["Toplam"][0]
+    df["Fiyat"] = fiyat.fillna(toplam / df["Adet"])
+    df["Komisyon"] = sayilar["Komisyon"][0].fillna(0.0)
+    # EKLE formundaki gibi komisyon alışta tutara eklenir, satışta düşülür
+    df["Toplam"] = toplam.fillna(df["Adet"] * fiyat + np.where(df["Islem"] == "ALIS", 1.0, -1.0) * df["Komisyon"])
+    gecerli = (
+        df["Tarih"].notna() & df["Islem"].isin(["ALIS", "SATIS"])
+        & (df["Sembol"] != "") & (df["Adet"] > 0) & ~okunamayan
+        & df["Fiyat"].notna() & df["Toplam"].notna()
+    )
+    return df.loc[gecerli, ISLEM_KOLONLARI], int((~gecerli).sum())
+
+
+def islem_ozetleri(df):
+    # Tekrar kontrolü için satır özeti: gün, yön, sembol, adet ve toplam tutar
+    anahtar = pd.DataFrame({
+        "Tarih": df["Tarih"].dt.strftime("%Y-%m-%d"),
+        "Islem": normalize_islem_kolon(df["Islem"]),
+        "Sembol": df["Sembol"].astype(str),
+        "Adet": df["Adet"].astype(float).round(6),
+        "Toplam": df["Toplam"].astype(float).round(2),
+    })
+    return pd.util.hash_pandas_object(anahtar, index=False).to_numpy()
+
+
+def ice_aktarim_plani(dosya, ad, mevcut, parca=OKUMA_PARCASI):
+    # Islemler'de zaten olan satırlar atlanır. Özetler adetle sayılır: aynı gün aynı
+    # işlemden iki tane varsa dosyadaki üçüncüsü yeni sayılır
+    kalan = {}
+    if not mevcut.empty:
+        ozetler, sayilar = np.unique(islem_ozetleri(mevcut), return_counts=True)
+        kalan = dict(zip(ozetler.tolist(), sayilar.tolist()))
+    # Ondalık ayırıcı ilk ipucu veren parçadan belirlenir; o zamana kadar nokta sayılır
+    parcalar, ozet = [], {"okunan": 0, "yeni": 0, "tekrar": 0, "hatali": 0, "ondalik": None}
+    for blok in parcalar_oku(dosya, ad, parca):
+        ozet["ondalik"] = ozet["ondalik"] or ondalik_ayirici(blok)
+        df, hatali = parcayi_normalize(blok, ozet["ondalik"] or ".")
+        ozet["okunan"] += len(blok)
+        ozet["hatali"] += hatali
+        yeni = np.ones(len(df), dtype=bool)
+        for i, h in enumerate(islem_ozetleri(df).tolist()):
+            if kalan.get(h, 0) > 0:
+                kalan[h] -= 1
+                yeni[i] = False
+        ozet["tekrar"] += int((~yeni).sum())
+        parcalar.append(df[yeni])
+    sonuc = pd.concat(parcalar, ignore_index=True) if parcalar else pd.DataFrame(columns=ISLEM_KOLONLARI)
+    ozet["yeni"] = len(sonuc)
+    return sonuc.sort_values("Tarih", kind="mergesort", ignore_index=True), ozet
+
+
+def ice_aktar(depo, yeni, fon_kayitlari, nakit=True, parca=YAZMA_PARCASI):
+    # Her parçanın işlemleri, nakit bacakları ve yeni fon kayıtları tek satirlar_ekle çağrısıdır
+    yazilan = 0
+    for bas in range(0, len(yeni), parca):
+        eklemeler = {"Islemler": [], "Fiyatlar": [], "Nakit": []}
+        for veri in yeni.iloc[bas:bas + parca].to_dict("records"):
+            veri["Tarih"] = veri["Tarih"].strftime("%Y-%m-%d")
+            veri["Islem"] = "Alis" if veri["Islem"] == "ALIS" else "Satis"
+            for sayfa, satirlar in islem_satirlari(veri, fon_kayitlari, nakit).items():
+                eklemeler[sayfa].extend(satirlar)
+        depo.satirlar_ekle(eklemeler)
+        yazilan += len(eklemeler["Islemler"])
+    return yazilan
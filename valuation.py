@@ -0,0 +1,72 @@
+from datetime import datetime
+
+from quotes import hisse_yasi
+
+
+def yas_metni(saniye):
+    if saniye is None:
+        return "—"
+    if saniye < 60:
+        return "şimdi"
+    if saniye < 3600:
+        return f"{int(saniye // 60)} dk"
+    if saniye < 86400:
+        return f"{int(saniye // 3600)} sa"
+    return f"{int(saniye // 86400)} gün"
+
+
+def portfoy_degerle(portfolio, hisse_fiyatlari, fund_data, fon_yasi, bugun_tarih=None):
+    # hisse_fiyatlari: sembol -> (güncel, önceki kapanış); fon fiyatları Fiyatlar sayfasından
+    liste = []
+    gunluk_toplam_tl = 0
+    bugun_tarih = bugun_tarih or datetime.now()
+
+    for sym, data in portfolio.items():
+        net = data["Adet"]
+        if net > 0:
+            em = data["Maliyet"]
+            v_tur = data["Tur"]
+            risk_kalan = data["NetGiris"]
+            ort_gun = data["Alimlar"].ortalama_gun(bugun_tarih, net)
+            guncel = 0.0
+            ref_fiyat = 0.0
+            if v_tur == "Hisse":
+                curr_p, prev_p = hisse_fiyatlari.get(sym, (0.0, 0.0))
+                guncel = curr_p if curr_p else 0
+                ref_fiyat = prev_p if prev_p else guncel
+                fiyat_yasi = hisse_yasi(sym)
+            else:
+                f_info = fund_data.get(sym, {"fiyat": 0, "yuzde": 0})
+                guncel = f_info["fiyat"]
+                pct = f_info["yuzde"]
+                fiyat_yasi = fon_yasi if guncel else None
+                if guncel == 0:
+                    guncel = em / net if net > 0 else 0
+                    ref_fiyat = guncel
+                else:
+                    ref_fiyat = guncel / (1 + (pct / 100))
+
+            deger = float(net * guncel)
+            gf_tl = (guncel - ref_fiyat) * net
+            gf_yuzde = ((guncel - ref_fiyat) / ref_fiyat) * 100 if ref_fiyat > 0 else 0
+            gf_metin = f"{gf_tl:+,.0f} (%{gf_yuzde:+.2f})"
+            gunluk_toplam_tl += gf_tl
+            maliyet_durumu = "BEDAVA" if risk_kalan <= 0 else risk_kalan
+
+            # BEDAVA pozisyonda tüm değer kar sayılır
+            if risk_kalan <= 0:
+                kz = deger
+                kz_yuzde = float('inf')
+            else:
+                kz = deger - em
+                kz_yuzde = (kz / em) * 100 if em > 0 else 0.0
+
+            liste.append({
+                "Varlık": sym, "Lot": net,
+                "Ort. Maliyet": (em / net) if net > 0 else 0,
+                "Fiyat": guncel, "Güncellik": yas_metni(fiyat_yasi), "Kalan Risk (TL)": maliyet_durumu,
+                "Değer (TL)": deger, "Ort. Süre": f"{ort_gun} Gün",
+                "K/Z (TL)": float(kz), "K/Z (%)": kz_yuzde,
+                "Günlük Fark": gf_metin
+            })
+    return liste, gunluk_toplam_tl
@@ -0,0 +1,89 @@
+import atexit
+import threading
+import time
+from datetime import datetime
+
+YAZMA_GECIKMESI = 3.0
+EN_FAZLA_GECIKME = 30.0
+DENEME_SAYISI = 4
+BEKLEME_TABANI = 2.0
+
+_kosul = threading.Condition()
+_bekleyen = {}
+_thread = None
+durum = {"yazilan": 0, "hata": 0, "son_yazim": None, "son_hata": None}
+
+
+def kuyruga_ekle(anahtar, fonk, *args):
+    # Aynı anahtar için yalnızca en son istek tutulur; sayaç her eklemede sıfırlanır
+    simdi = time.monotonic()
+    with _kosul:
+        eski = _bekleyen.get(anahtar)
+        _bekleyen[anahtar] = {
+            "fonk": fonk, "args": args, "zaman": simdi,
+            "ilk": eski["ilk"] if eski else simdi, "deneme": 0, "sonraki": 0.0,
+        }
+        _kosul.notify()
+    _baslat()
+
+
+def bekleyen_sayisi():
+    with _kosul:
+        return len(_bekleyen)
+
+
+def _hazir_mi(is_, simdi):
+    if simdi < is_["sonraki"]:
+        return False
+    return simdi - is_["zaman"] >= YAZMA_GECIKMESI or simdi - is_["ilk"] >= EN_FAZLA_GECIKME
+
+
+def _yaz(anahtar, is_):
+    try:
+        is_["fonk"](*is_["args"])
+    except Exception as e:
+        durum["hata"] += 1
+        durum["son_hata"] = f"{anahtar}: {e}"
+        print(f"[Yazıcı] {anahtar} hata (deneme {is_['deneme'] + 1}): {e}")
+        is_["deneme"] += 1
+        if is_["deneme"] < DENEME_SAYISI:
+            is_["sonraki"] = time.monotonic() + BEKLEME_TABANI ** is_["deneme"]
+            with _kosul:
+                # Bu arada daha yeni bir istek geldiyse eskisi tekrar denenmez
+                _bekleyen.setdefault(anahtar, is_)
+        return
+    durum["yazilan"] += 1
+    durum["son_yazim"] = datetime.now()
+    if is_["deneme"]:
+        durum["son_hata"] = None
+
+
+def _calis():
+    while True:
+        with _kosul:
+            while True:
+                simdi = time.monotonic()
+                hazir = [a for a, is_ in _bekleyen.items() if _hazir_mi(is_, simdi)]
+                if hazir:
+                    break
+                _kosul.wait(timeout=1.0)
+            isler = [(a, _bekleyen.pop(a)) for a in hazir]
+        for anahtar, is_ in isler:
+            _yaz(anahtar, is_)
+
+
+def _baslat():
+    global _thread
+    with _kosul:
+        if _thread is None or not _thread.is_alive():
+            _thread = threading.Thread(target=_calis, name="snapshot-yazici", daemon=True)
+            _thread.start()
+
+
+@atexit.register
+def bosalt():
+    with _kosul:
+        isler = list(_bekleyen.items())
+        _bekleyen.clear()
+    for anahtar, is_ in isler:
+        _yaz(anahtar, is_)